@@ -0,0 +1,88 @@
+import random
+from typing import Any, Dict, List
+
+# Approximate pages of text per corpus size (about 500 words per page)
+SIZES = {
+    "tiny": 1,
+    "small": 5,
+    "medium": 20,
+    "large": 60,
+    "thesis": 200,
+}
+WORDS_PER_PAGE = 500
+SECTION_SHARES = {
+    "abstract": 0.03,
+    "introduction": 0.2,
+    "methodology": 0.3,
+    "results": 0.35,
+    "conclusion": 0.12,
+}
+
+_VOCABULARY = (
+    "model data result method analysis system network learning approach performance "
+    "evaluation experiment sample training error accuracy signal process design study "
+    "value function parameter structure feature algorithm input output layer baseline "
+    "significant observed proposed measured compared improved reduced increased the of "
+    "and to in for with on by that this is are was were we our these their which"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_VOCABULARY) for _ in range(rng.randint(8, 24))]
+    return " ".join(words).capitalize() + "."
+
+
+def _text(rng: random.Random, words: int) -> str:
+    """Paragraphs of roughly 120 words, one per line, until ``words`` is reached"""
+    paragraphs: List[str] = []
+    written = 0
+    while written < words:
+        paragraph = []
+        while sum(len(sentence.split()) for sentence in paragraph) < 120:
+            paragraph.append(_sentence(rng))
+        text = " ".join(paragraph)
+        paragraphs.append(text)
+        written += len(text.split())
+    return "\n".join(paragraphs)
+
+
+def make_report(size: str = "small", seed: int = 0, user_id: str = "bench-user",
+                template: str = "ieee") -> Dict[str, Any]:
+    """
+    Build a deterministic synthetic report
+
+    Args:
+        size: One of SIZES
+        seed: Seed for the text, so runs are reproducible
+        user_id: Owner of the report
+        template: Template name ('ieee' or 'springer')
+
+    Returns:
+        A dict accepted by POST /api/reports/ and create_document
+    """
+    rng = random.Random(f"{size}:{seed}")
+    words = SIZES[size] * WORDS_PER_PAGE
+    report = {
+        "title": _sentence(rng)[:-1],
+        "authors": [f"Author {rng.randint(1, 999)}" for _ in range(rng.randint(1, 4))],
+        "references": [
+            {
+                "authors": [f"{rng.choice('ABCDEFGH')}. {rng.choice(_VOCABULARY).title()}" for _ in range(rng.randint(1, 5))],
+                "title": _sentence(rng)[:-1],
+                "journal": f"Journal of {rng.choice(_VOCABULARY).title()}",
+                "volume": rng.randint(1, 60),
+                "pages": f"{i + 1}-{i + 12}",
+                "year": 2000 + i % 25,
+            }
+            for i in range(max(3, SIZES[size] * 2))
+        ],
+        "template": template,
+        "user_id": user_id,
+    }
+    for section, share in SECTION_SHARES.items():
+        report[section] = _text(rng, int(words * share))
+    return report
+
+
+def make_corpus(size: str, count: int, user_id: str = "bench-user") -> List[Dict[str, Any]]:
+    return [make_report(size, seed, user_id) for seed in range(count)]
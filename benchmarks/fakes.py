@@ -0,0 +1,85 @@
+import asyncio
+import random
+from types import SimpleNamespace
+from typing import Optional
+
+
+class FakeResponse:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=len(text) // 4,
+        )
+
+
+class FakeStream:
+    def __init__(self, parts, latency: float, prompt_tokens: int):
+        self.parts = parts
+        self.latency = latency
+        self.prompt_tokens = prompt_tokens
+
+    async def __aiter__(self):
+        for part in self.parts:
+            await asyncio.sleep(self.latency / len(self.parts))
+            yield FakeResponse(part, self.prompt_tokens)
+
+
+class FakeGeminiModel:
+    """
+    Stand-in for genai.GenerativeModel with a configurable latency
+
+    Latency is ``latency`` seconds plus uniform jitter of ``jitter`` seconds;
+    the reply length is ``output_chars`` characters.
+    """
+
+    model_name = "models/fake-gemini"
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, output_chars: int = 1200, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.output_chars = output_chars
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def _delay(self) -> float:
+        return self.latency + self._rng.uniform(0, self.jitter)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        text = ("Generated text. " * (self.output_chars // 16 + 1))[:self.output_chars]
+        if stream:
+            parts = [text[i:i + 200] for i in range(0, len(text), 200)]
+            return FakeStream(parts, self._delay(), len(prompt) // 4)
+        await asyncio.sleep(self._delay())
+        return FakeResponse(text, len(prompt) // 4)
+
+
+def install_fake_gemini(latency: float, jitter: float, max_concurrency: Optional[int] = None) -> FakeGeminiModel:
+    """Replace the process-wide AI client's model with a FakeGeminiModel"""
+    import utils.ai_client as ai_client
+    model = FakeGeminiModel(latency, jitter)
+    ai_client._client = ai_client.AIClient(model, **({"max_concurrency": max_concurrency} if max_concurrency else {}))
+    return model
+
+
+def install_database(mongo_uri: Optional[str] = None):
+    """
+    Point database.py at a throwaway database
+
+    Uses a real MongoDB when ``mongo_uri`` is given (a ``report_generator_bench``
+    database that is dropped first), otherwise an in-memory mongomock-motor client.
+    """
+    import database
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        database.client = AsyncIOMotorClient(mongo_uri)
+        database.db = database.client.get_database("report_generator_bench")
+        return database.db
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("Install benchmarks/requirements.txt (mongomock-motor) or pass --mongo-uri")
+    database.client = AsyncMongoMockClient()
+    database.db = database.client.get_database("report_generator_bench")
+    return database.db
@@ -0,0 +1,271 @@
+"""
+Offline benchmark suite
+
+Runs the API in-process against a fake Gemini model and mongomock-motor (or
+a local MongoDB with --mongo-uri) and writes throughput and latency
+percentiles as JSON. With --baseline, exits with status 1 when a p50
+regresses by more than --tolerance.
+
+    python benchmarks/run.py --sizes tiny,small --out bench.json
+    python benchmarks/run.py --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Rendered files go to a scratch folder rather than the OUTPUT_FOLDER from .env
+os.environ.setdefault("OUTPUT_FOLDER", os.path.join(tempfile.gettempdir(), "report-bench-output"))
+
+from benchmarks.corpus import SIZES, make_report  # noqa: E402
+from benchmarks.fakes import install_database, install_fake_gemini  # noqa: E402
+
+AI_ENDPOINTS = ["abstract", "conclusion", "reword", "synopsis"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, size: str, latencies: List[float], elapsed: float, **extra: Any) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "size": size,
+        "n": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        **extra,
+    }
+
+
+async def measure(calls: Callable[[int], Awaitable[Any]], n: int, concurrency: int):
+    """Run ``calls(i)`` for i in range(n) with at most ``concurrency`` in flight"""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await calls(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(n)])
+    return latencies, time.perf_counter() - started
+
+
+def check(response, expected: int = 200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+async def bench_api(args, results: List[Dict[str, Any]]) -> None:
+    import httpx
+    import main
+
+    db = install_database(args.mongo_uri)
+    if args.mongo_uri:
+        await db.client.drop_database(db.name)
+        import database
+        await database.create_indexes(db)
+    install_fake_gemini(args.ai_latency, args.ai_jitter)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for size in args.sizes:
+            corpus = [make_report(size, seed) for seed in range(min(args.n, 20))]
+
+            async def create(i: int):
+                check(await client.post("/api/reports/", json=corpus[i % len(corpus)]))
+
+            latencies, elapsed = await measure(create, args.n, args.concurrency)
+            results.append(summarize("create_report", size, latencies, elapsed, concurrency=args.concurrency))
+
+            for view, fmt in (("full", "json"), ("summary", "json"), ("full", "ndjson")):
+                async def list_page(i: int, view=view, fmt=fmt):
+                    params = {"limit": 20, "view": view, "format": fmt, "user_id": "bench-user"}
+                    check(await client.get("/api/reports/", params=params))
+
+                name = f"list_reports[{view}]" if fmt == "json" else f"list_reports[{view},{fmt}]"
+                latencies, elapsed = await measure(list_page, args.n, args.concurrency)
+                results.append(summarize(name, size, latencies, elapsed, concurrency=args.concurrency))
+
+            source = corpus[0]["introduction"]
+            for endpoint in AI_ENDPOINTS:
+                async def ai_call(i: int, endpoint=endpoint):
+                    # A unique suffix defeats the response cache, so every call reaches the model
+                    text = f"{source}\n{size}-{endpoint}-{i}-{time.time_ns()}"
+                    check(await client.post(f"/api/ai/{endpoint}", params={"text": text}))
+
+                n = max(1, args.n // 2)
+                latencies, elapsed = await measure(ai_call, n, args.concurrency)
+                results.append(summarize(f"ai[{endpoint}]", size, latencies, elapsed,
+                                         concurrency=args.concurrency, ai_latency_s=args.ai_latency))
+
+            # Clean up so later sizes list their own reports
+            await db.reports.delete_many({})
+
+
+def bench_render(args, results: List[Dict[str, Any]]) -> None:
+    """Render in-process (what each worker does)"""
+    import utils.docx_generator as docx_generator
+    import utils.pdf_renderer as pdf_renderer
+
+    def docx(report, template):
+        doc = docx_generator.create_document(report, template)
+        doc.save(BytesIO())
+
+    def pdf(report, template):
+        pdf_renderer.create_pdf(report, template)
+
+    for size in args.sizes:
+        n = max(1, args.render_n if SIZES[size] < 60 else args.render_n // 5)
+        for template in ("ieee", "springer"):
+            for fmt, render in (("docx", docx), ("pdf", pdf)):
+                latencies = []
+                started_all = time.perf_counter()
+                for seed in range(n):
+                    report = make_report(size, seed, template=template)
+                    started = time.perf_counter()
+                    render(report, template)
+                    latencies.append(time.perf_counter() - started)
+                elapsed = time.perf_counter() - started_all
+                results.append(summarize(f"render[{fmt},{template}]", size, latencies, elapsed))
+
+
+def bench_serialize(args, results: List[Dict[str, Any]]) -> None:
+    """Encode a page of stored reports the way FastAPI's response model does and the fast way"""
+    from bson import ObjectId
+    from pydantic import TypeAdapter
+
+    from models import Report
+    from utils.serialization import dumps, report_document
+
+    adapter = TypeAdapter(List[Report])
+
+    def pydantic_page(page):
+        return adapter.dump_json(adapter.validate_python(page), by_alias=True)
+
+    def fast_page(page):
+        return dumps([report_document(report) for report in page])
+
+    for size in args.sizes:
+        page = []
+        for seed in range(20):
+            report = make_report(size, seed)
+            now = datetime.utcnow()
+            report.update({"_id": ObjectId(), "created_at": now, "updated_at": now})
+            page.append(report)
+        for name, encode in (("pydantic", pydantic_page), ("fast", fast_page)):
+            n = max(1, args.render_n * 10)
+            latencies = []
+            cpu_started = time.process_time()
+            started_all = time.perf_counter()
+            for _ in range(n):
+                started = time.perf_counter()
+                encode(page)
+                latencies.append(time.perf_counter() - started)
+            elapsed = time.perf_counter() - started_all
+            cpu_ms = (time.process_time() - cpu_started) / n * 1000
+            results.append(summarize(f"serialize_page[{name}]", size, latencies, elapsed,
+                                     cpu_ms_per_page=round(cpu_ms, 3)))
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Return a line per benchmark whose p50 got slower than the baseline allows"""
+    with open(baseline_path) as f:
+        baseline = {(item["name"], item["size"]): item for item in json.load(f)["results"]}
+    regressions = []
+    for item in results:
+        before = baseline.get((item["name"], item["size"]))
+        if before and before["p50_ms"] > 0 and item["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{item['name']} [{item['size']}]: p50 {before['p50_ms']} -> {item['p50_ms']} ms")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="tiny,small,medium",
+                        help=f"Comma-separated corpus sizes ({', '.join(SIZES)})")
+    parser.add_argument("--n", type=int, default=50, help="Requests per API benchmark")
+    parser.add_argument("--render-n", type=int, default=10, help="Renders per render benchmark")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ai-latency", type=float, default=0.2, help="Fake Gemini latency in seconds")
+    parser.add_argument("--ai-jitter", type=float, default=0.05)
+    parser.add_argument("--mongo-uri", help="Use this MongoDB instead of mongomock-motor")
+    parser.add_argument("--only", choices=["api", "render", "serialize"], help="Run only one group")
+    parser.add_argument("--out", help="Write results to this JSON file (default: stdout)")
+    parser.add_argument("--baseline", help="Fail when p50s regress against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    args.sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in args.sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results: List[Dict[str, Any]] = []
+    if args.only in (None, "api"):
+        asyncio.run(bench_api(args, results))
+    if args.only in (None, "serialize"):
+        bench_serialize(args, results)
+    if args.only in (None, "render"):
+        bench_render(args, results)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": "mongodb" if args.mongo_uri else "mongomock",
+            "args": {key: value for key, value in vars(args).items() if key not in ("out", "baseline", "mongo_uri")},
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import os
+import shutil
+import tempfile
+
+# .env points OUTPUT_FOLDER at ./output; keep rendered files from test runs
+# out of the working tree. This runs before any test module imports utils.jobs.
+os.environ["OUTPUT_FOLDER"] = tempfile.mkdtemp(prefix="report-tests-")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(os.environ["OUTPUT_FOLDER"], ignore_errors=True)
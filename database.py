@@ -1,34 +1,98 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 from dotenv import load_dotenv
 import os
 
+from utils.search import TEXT_INDEX_WEIGHTS
+
 load_dotenv()
 
 # MongoDB connection
 MONGODB_URL = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 client = None
 db = None
+_index_task = None
 
-async def connect_to_mongo():
+def get_database():
+    """
+    Return the database, creating the client on first use
+
+    The client lives for the whole process, so warm (serverless)
+    invocations reuse its connection pool instead of reconnecting.
+    Creating it does not touch the network.
+    """
     global client, db
-    try:
-        client = AsyncIOMotorClient(MONGODB_URL)
+    if db is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from utils.metrics import mongo_listener
+        client = AsyncIOMotorClient(MONGODB_URL, event_listeners=[mongo_listener()])
         db = client.get_database("report_generator")
-        # Test the connection
-        await client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
-        return db
+        # Serverless runtimes may skip the startup event, so do it here too
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            ensure_indexes()
+    return db
+
+async def connect_to_mongo():
+    """Set up the client and create the indexes in the background"""
+    database = get_database()
+    ensure_indexes()
+    return database
+
+def ensure_indexes():
+    """Create the indexes once per process without making the caller wait for them"""
+    global _index_task
+    if _index_task is None:
+        _index_task = asyncio.ensure_future(_create_indexes_in_background())
+    return _index_task
+
+async def _create_indexes_in_background():
+    try:
+        await create_indexes(get_database())
+        print("MongoDB indexes are ready")
     except Exception as e:
-        print(f"Failed to connect to MongoDB: {e}")
-        raise
+        print(f"Failed to create MongoDB indexes: {e}")
+
+async def create_indexes(database):
+    """Create the indexes the API relies on (no-op when they already exist)"""
+    # Keyset pagination of report lists, optionally per user
+    await database.reports.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    await database.reports.create_index([("created_at", -1), ("_id", -1)])
+    # Full-text search (a collection can only have one text index)
+    await database.reports.create_index(
+        [(field, "text") for field in TEXT_INDEX_WEIGHTS],
+        weights=TEXT_INDEX_WEIGHTS,
+        name="report_text",
+    )
+    # Expire cached AI responses automatically
+    await database.ai_cache.create_index("expires_at", expireAfterSeconds=0)
+    # Plagiarism index: LSH bucket lookups and per-report replacement
+    await database.report_signatures.create_index("bands")
+    await database.report_signatures.create_index("report_id")
 
 async def close_mongo_connection():
+    global client, db, _index_task
     if client:
         client.close()
+    client = None
+    db = None
+    _index_task = None
 
 # Collections
 def get_reports_collection():
-    return db.reports
+    return get_database().reports
 
 def get_users_collection():
-    return db.users
+    return get_database().users
+
+def get_ai_cache_collection():
+    return get_database().ai_cache
+
+def get_signatures_collection():
+    return get_database().report_signatures
+
+def get_artifact_bucket():
+    from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+    return AsyncIOMotorGridFSBucket(get_database(), bucket_name="artifacts")
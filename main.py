@@ -1,30 +1,51 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
 import os
 import uuid
-import google.generativeai as genai
+import json
+import time
+import asyncio
+import re
+import math
+import tempfile
+from functools import partial
+from bson import ObjectId
 from dotenv import load_dotenv
 from datetime import datetime
 from pathlib import Path
-from motor.motor_asyncio import AsyncIOMotorCollection
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
 
 # Import database and models
 from database import connect_to_mongo, close_mongo_connection, get_reports_collection
-from models import Report, ReportCreate, UserCreate, UserInDB, PyObjectId
+from models import (
+    Report, ReportCreate, UserCreate, UserInDB, AIBatchRequest,
+    GenerateReportRequest, ReportPatch, REPORT_SECTIONS, REPORT_CONTENT_FIELDS, REPORT_SUMMARY_FIELDS,
+)
+from utils.ai_client import get_ai_client, peek_ai_client
+from utils.ai_scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, QuotaExceeded
+from utils.ai_cache import get_ai_cache, make_cache_key
+from utils.summarizer import SUMMARY_CHUNK_TOKENS, condense, estimate_tokens, map_reduce_summarize
+from utils.jobs import RENDER_WORKERS, SUPPORTED_FORMATS, get_job_manager
+from utils.artifact_cache import content_hash, get_artifact_cache
+from utils.artifact_store import CONTENT_TYPES, STREAM_CHUNK_SIZE, RangeNotSatisfiable, get_artifact_store, parse_range
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter
+from utils.bulk_import import BulkFormatError, iter_json_array, iter_ndjson
+from utils.extraction import ExtractionError, UploadTooLarge, detect_format, extract_report, save_upload
+from utils.similarity import get_similarity_index
+from utils.plagiarism import check_plagiarism, close_plagiarism_client
+from utils.search import build_snippets, query_terms
+from utils.zip_stream import ZipStream
+from utils.metrics import MetricsMiddleware, registry, span
+from utils.serialization import FastJSONResponse, dumps, report_document, report_summary
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    print("Warning: GEMINI_API_KEY not found in environment variables")
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
-
 app = FastAPI(
     title="Project Report Generator API",
     description="API for generating and managing project reports with AI assistance",
@@ -40,6 +61,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms and optional Server-Timing headers
+app.add_middleware(MetricsMiddleware)
+
 # Database connection events
 @app.on_event("startup")
 async def startup_db_client():
@@ -49,18 +73,181 @@ async def startup_db_client():
 async def shutdown_db_client():
     await close_mongo_connection()
 
+@app.on_event("shutdown")
+async def shutdown_plagiarism_client():
+    await close_plagiarism_client()
+
+@app.on_event("shutdown")
+async def shutdown_render_pool():
+    get_job_manager().shutdown()
+
 # Helper function to get reports collection
-async def get_reports() -> AsyncIOMotorCollection:
+async def get_reports() -> "AsyncIOMotorCollection":
     return get_reports_collection()
 
-async def generate_ai_text(prompt: str) -> str:
-    """Generate text using Gemini API"""
+def utc_now() -> datetime:
+    """Current UTC time at MongoDB's millisecond precision, so responses match stored values"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def parse_object_id(report_id: str) -> ObjectId:
+    if not ObjectId.is_valid(report_id):
+        raise HTTPException(status_code=400, detail="Invalid report ID")
+    return ObjectId(report_id)
+
+async def load_report_source(report_id: Optional[str], report: Optional[ReportCreate]) -> Dict[str, Any]:
+    """Return a stored report by ID, or the inline report, as a dict"""
+    if (report_id is None) == (report is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of report_id or report")
+    if report is not None:
+        return report.dict()
+    reports_collection = await get_reports()
+    stored = await reports_collection.find_one({"_id": parse_object_id(report_id)})
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return stored
+
+# Bump PROMPT_VERSION whenever a template changes so cached responses are not reused
+PROMPT_VERSION = "2"
+PROMPT_TEMPLATES = {
+    "abstract": """Generate a professional abstract (150-250 words) for a research paper based on the following content.
+    Include the purpose, methodology, findings, and significance of the research.
+
+    Content:
+    {text}
+
+    Abstract:""",
+    "conclusion": """Write a comprehensive conclusion for a research paper based on the following content.
+    The conclusion should summarize the key findings, discuss their implications, and suggest future research directions.
+
+    Content:
+    {text}
+
+    Conclusion:""",
+    "reword": """Improve the grammar, clarity, and flow of the following academic text while preserving its original meaning.
+    Make it more professional and academic. Do not change the technical terms or specific information.
+
+    Original text:
+    {text}
+
+    Improved version:""",
+    "synopsis": """Create a concise 2-page summary (approximately 1000 words) of the following content.
+    Include the main points, methodology, results, and conclusions.
+
+    Content:
+    {text}
+
+    Summary:""",
+}
+
+# Endpoints whose input is summarized chunk by chunk when it is too large for one prompt
+CHUNKED_ENDPOINTS = {"abstract", "synopsis"}
+
+# Scheduling priority of each endpoint's model calls when quota is short
+ENDPOINT_PRIORITIES = {
+    "reword": PRIORITY_INTERACTIVE,
+    "abstract": PRIORITY_NORMAL,
+    "conclusion": PRIORITY_NORMAL,
+    "synopsis": PRIORITY_BULK,
+}
+
+def retry_after_header(error: QuotaExceeded) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+async def run_ai(compute, cache_key: Optional[str] = None) -> str:
+    """Run an AI computation through the response cache, mapping failures to HTTP errors"""
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        if cache_key is None:
+            return await compute()
+        return await get_ai_cache().get_or_compute(cache_key, compute)
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail="AI quota exceeded, retry later",
+                            headers=retry_after_header(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="AI generation timed out")
     except Exception as e:
         print(f"Error generating AI text: {e}")
-        return f"Error generating content: {str(e)}"
+        raise HTTPException(status_code=502, detail=f"Error generating content: {str(e)}")
+
+async def generate_ai_text(prompt: str, cache_key: Optional[str] = None) -> str:
+    """Generate text using Gemini API"""
+    return await run_ai(lambda: get_ai_client().generate(prompt), cache_key=cache_key)
+
+def needs_chunking(endpoint: str, text: str) -> bool:
+    return endpoint in CHUNKED_ENDPOINTS and estimate_tokens(text) > SUMMARY_CHUNK_TOKENS
+
+def endpoint_cache_key(endpoint: str, text: str) -> str:
+    return make_cache_key(endpoint, PROMPT_VERSION, get_ai_client().model.model_name, text)
+
+def endpoint_compute(endpoint: str, text: str, priority: Optional[int] = None):
+    """Return a coroutine function producing the endpoint's response for ``text``"""
+    generate = partial(get_ai_client().generate,
+                       priority=ENDPOINT_PRIORITIES[endpoint] if priority is None else priority)
+    if needs_chunking(endpoint, text):
+        # Chunk summaries are bulk work; only the reduce pass runs at the endpoint's priority
+        chunk_generate = partial(get_ai_client().generate, priority=PRIORITY_BULK)
+        return lambda: map_reduce_summarize(text, PROMPT_TEMPLATES[endpoint], generate,
+                                            chunk_generate=chunk_generate)
+    prompt = PROMPT_TEMPLATES[endpoint].format(text=text)
+    return lambda: generate(prompt)
+
+async def generate_for_endpoint(endpoint: str, text: str) -> str:
+    """Render the endpoint's prompt template and generate a (cached) response"""
+    return await run_ai(endpoint_compute(endpoint, text), cache_key=endpoint_cache_key(endpoint, text))
+
+def format_stream_event(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
+
+async def stream_for_endpoint(endpoint: str, text: str, request: Request, stream_format: str):
+    """Yield generated text for an endpoint as SSE events or JSON lines"""
+    cache = get_ai_cache()
+    cache_key = endpoint_cache_key(endpoint, text)
+    cached = cache.peek(cache_key)
+    if cached is not None:
+        yield format_stream_event("chunk", {"text": cached}, stream_format)
+        yield format_stream_event("done", {"cached": True}, stream_format)
+        return
+
+    parts = []
+    chunks = None
+    try:
+        if needs_chunking(endpoint, text):
+            # Condense the input first, then stream the final reduce pass
+            text = await condense(text, partial(get_ai_client().generate, priority=PRIORITY_BULK))
+        chunks = get_ai_client().stream(PROMPT_TEMPLATES[endpoint].format(text=text),
+                                        priority=ENDPOINT_PRIORITIES[endpoint])
+        async for chunk in chunks:
+            if await request.is_disconnected():
+                # Stop pulling from the model; closing the iterator cancels upstream
+                return
+            parts.append(chunk)
+            yield format_stream_event("chunk", {"text": chunk}, stream_format)
+    except QuotaExceeded as e:
+        yield format_stream_event("error", {"detail": "AI quota exceeded, retry later",
+                                            "retry_after": math.ceil(e.retry_after)}, stream_format)
+        return
+    except asyncio.TimeoutError:
+        yield format_stream_event("error", {"detail": "AI generation timed out"}, stream_format)
+        return
+    except Exception as e:
+        print(f"Error streaming AI text: {e}")
+        yield format_stream_event("error", {"detail": f"Error generating content: {str(e)}"}, stream_format)
+        return
+    finally:
+        if chunks is not None:
+            await chunks.aclose()
+
+    await cache.put(cache_key, "".join(parts))
+    yield format_stream_event("done", {"cached": False}, stream_format)
+
+async def index_for_plagiarism(reports: List[Dict[str, Any]]) -> None:
+    """Refresh the local plagiarism index; a failure here must not fail the write"""
+    try:
+        await get_similarity_index().index_reports(reports)
+    except Exception as e:
+        print(f"Error updating plagiarism index: {e}")
 
 # Report endpoints
 @app.post("/api/reports/", response_model=Report)
@@ -68,88 +255,779 @@ async def create_report(report: ReportCreate):
     """Create a new report"""
     reports_collection = await get_reports()
     report_dict = report.dict()
-    report_dict["created_at"] = datetime.utcnow()
-    report_dict["updated_at"] = datetime.utcnow()
+    report_dict["created_at"] = utc_now()
+    report_dict["updated_at"] = report_dict["created_at"]
     
     result = await reports_collection.insert_one(report_dict)
-    created_report = await reports_collection.find_one({"_id": result.inserted_id})
-    return created_report
+    report_dict["_id"] = result.inserted_id
+    await index_for_plagiarism([report_dict])
+    return report_dict
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+
+async def insert_report_batch(reports_collection, batch: List[tuple], results: List[Dict[str, Any]]) -> None:
+    """Insert validated (index, report dict) pairs unordered, recording per-item outcomes"""
+    from pymongo.errors import BulkWriteError
+    documents = [document for _, document in batch]
+    failed = {}
+    try:
+        await reports_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed[error["index"]] = error.get("errmsg", "Write failed")
+    for position, (index, document) in enumerate(batch):
+        if position in failed:
+            results.append({"index": index, "error": failed[position]})
+        else:
+            results.append({"index": index, "id": str(document["_id"])})
+    await index_for_plagiarism([document for position, document in enumerate(documents) if position not in failed])
+
+@app.post("/api/reports/bulk")
+async def bulk_create_reports(request: Request):
+    """
+    Create many reports from a JSON array or NDJSON body
+
+    The body is parsed as it streams in, validated against ReportCreate and
+    written in unordered insert_many batches. Invalid items are reported by
+    index without stopping the import.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = iter_ndjson(request.stream())
+    else:
+        items = iter_json_array(request.stream())
+
+    reports_collection = await get_reports()
+    results: List[Dict[str, Any]] = []
+    batch: List[tuple] = []
+    format_error = None
+    try:
+        async for index, item in items:
+            if isinstance(item, Exception):
+                results.append({"index": index, "error": str(item)})
+                continue
+            try:
+                report_dict = ReportCreate.model_validate(item).dict()
+            except ValidationError as e:
+                results.append({"index": index, "error": e.errors(include_url=False, include_context=False)})
+                continue
+            now = utc_now()
+            report_dict["created_at"] = now
+            report_dict["updated_at"] = now
+            batch.append((index, report_dict))
+            if len(batch) >= BULK_BATCH_SIZE:
+                await insert_report_batch(reports_collection, batch, results)
+                batch = []
+    except BulkFormatError as e:
+        format_error = str(e)
+    if batch:
+        await insert_report_batch(reports_collection, batch, results)
+
+    results.sort(key=lambda result: result["index"])
+    if format_error is not None:
+        # The body stopped parsing here, so its error goes after the items read before it
+        results.append({"error": format_error})
+    inserted = sum(1 for result in results if "id" in result)
+    return {"inserted": inserted, "failed": len(results) - inserted, "items": results}
+
+@app.post("/api/reports/upload", response_model=Report)
+async def upload_report(
+    request: Request,
+    response: Response,
+    user_id: Optional[str] = None,
+    template: str = "ieee",
+    title: Optional[str] = None,
+    authors: List[str] = Query(default=[]),
+):
+    """
+    Create a report from a DOCX or PDF sent as the raw request body
+
+    The body is streamed to a temporary file and its text extracted in a
+    worker thread. Headings such as 'Abstract', 'Methods' or 'Conclusions'
+    are mapped onto the report sections; the ones found are listed in the
+    ``X-Detected-Sections`` header. ``title`` overrides the extracted title.
+    """
+    with tempfile.NamedTemporaryFile(prefix="upload-") as upload:
+        try:
+            head = await save_upload(request.stream(), upload)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        file_format = detect_format(head)
+        if file_format is None:
+            raise HTTPException(status_code=415, detail="Upload a DOCX or PDF file")
+        try:
+            with span("extract"):
+                extracted = await asyncio.to_thread(extract_report, upload.name, file_format)
+        except ExtractionError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    headings = extracted.pop("headings")
+    extracted.update({"authors": authors, "template": template, "user_id": user_id})
+    if title:
+        extracted["title"] = title
+    report_dict = ReportCreate.model_validate(extracted).dict()
+    report_dict["created_at"] = utc_now()
+    report_dict["updated_at"] = report_dict["created_at"]
+
+    reports_collection = await get_reports()
+    result = await reports_collection.insert_one(report_dict)
+    report_dict["_id"] = result.inserted_id
+    await index_for_plagiarism([report_dict])
+    response.headers["X-Detected-Sections"] = ",".join(headings)
+    return report_dict
+
+# Newest first; matches the (user_id, created_at, _id) indexes created at startup
+REPORT_LIST_SORT = [("created_at", -1), ("_id", -1)]
+MAX_PAGE_SIZE = 100
+MAX_STREAM_PAGE_SIZE = int(os.getenv("MAX_STREAM_PAGE_SIZE", "1000"))
+
+def next_page_cursor(last: Dict[str, Any]) -> str:
+    return encode_cursor({field: last.get(field) for field, _ in REPORT_LIST_SORT})
+
+async def stream_report_page(find, limit: int, shape=report_document):
+    """Yield a page of reports as JSON lines as they arrive, then the next cursor if the page is full"""
+    count = 0
+    last = None
+    buffer = bytearray()
+    async for report in find:
+        count += 1
+        last = report
+        buffer += dumps(shape(report))
+        buffer += b"\n"
+        if len(buffer) >= STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if count == limit:
+        buffer += dumps({"next_cursor": next_page_cursor(last)})
+        buffer += b"\n"
+    if buffer:
+        yield bytes(buffer)
 
 @app.get("/api/reports/", response_model=List[Report])
-async def list_reports(limit: int = 10, skip: int = 0):
-    """List all reports with pagination"""
+async def list_reports(
+    limit: int = 10,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    view: str = "full",
+    format: str = "json",
+):
+    """
+    List reports, newest first
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch the
+    next page; every page costs the same regardless of depth. ``skip`` is
+    kept for older clients. ``view=summary`` leaves out section bodies and
+    references.
+
+    ``format=ndjson`` streams one report per line as it is read, allows pages
+    of up to MAX_STREAM_PAGE_SIZE reports, and ends a full page with a
+    ``{"next_cursor": ...}`` line instead of the header.
+    """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
+    limit = max(1, min(limit, MAX_STREAM_PAGE_SIZE if format == "ndjson" else MAX_PAGE_SIZE))
+
+    query: Dict[str, Any] = {}
+    if user_id is not None:
+        query["user_id"] = user_id
+    if cursor:
+        try:
+            query.update(keyset_filter(REPORT_LIST_SORT, decode_cursor(cursor)))
+        except (ValueError, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    projection = REPORT_SUMMARY_FIELDS if view == "summary" else None
+    shape = report_summary if view == "summary" else report_document
+
+    reports_collection = await get_reports()
+    find = reports_collection.find(query, projection).sort(REPORT_LIST_SORT)
+    if skip and not cursor:
+        find = find.skip(skip)
+    find = find.limit(limit)
+    if format == "ndjson":
+        return StreamingResponse(stream_report_page(find, limit, shape), media_type="application/x-ndjson")
+
+    # Stored reports were validated on write, so skip the response model and encode directly
+    reports = await find.to_list(length=limit)
+    response = FastJSONResponse([shape(report) for report in reports])
+    if len(reports) == limit:
+        response.headers["X-Next-Cursor"] = next_page_cursor(reports[-1])
+    return response
+
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", str(RENDER_WORKERS)))
+
+async def artifact_chunks(filename: str):
+    """Yield a rendered file from local disk or GridFS in fixed-size chunks"""
+    key, fmt = filename.rsplit(".", 1)
+    path = get_artifact_cache().get(key, fmt)
+    if path is not None:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    store = get_artifact_store()
+    grid_out = await store.open(filename)
+    if grid_out is None:
+        raise FileNotFoundError(filename)
+    async for chunk in store.iter_range(grid_out, 0, grid_out.length - 1):
+        yield chunk
+
+async def render_for_export(report: Dict[str, Any], formats: List[str]):
+    """Render (or find) a report's files; returns (report, files, error)"""
+    try:
+        _, job_id = await submit_render(report, str(report["_id"]), formats)
+        return report, await get_job_manager().wait(job_id), None
+    except Exception as e:
+        return report, {}, str(e)
+
+def export_entry_name(report: Dict[str, Any], fmt: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", report.get("title") or "report").strip("-")[:60] or "report"
+    return f"{slug}_{report['_id']}.{fmt}"
+
+async def stream_export(reports, formats: List[str]):
+    """
+    Render reports with at most EXPORT_CONCURRENCY in flight and stream them
+    into a ZIP as each one finishes. Failures are listed in errors.txt.
+    """
+    archive = ZipStream()
+    pending = set()
+    errors = []
+    exhausted = False
+    reports = reports.__aiter__()
+    try:
+        while True:
+            while not exhausted and len(pending) < EXPORT_CONCURRENCY:
+                try:
+                    report = await reports.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(render_for_export(report, formats)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                report, files, error = task.result()
+                if error is not None:
+                    errors.append(f"{report['_id']}: {error}")
+                    continue
+                for fmt, filename in files.items():
+                    # Make sure the file exists before starting its ZIP entry
+                    chunks = artifact_chunks(filename)
+                    try:
+                        first = await chunks.__anext__()
+                    except (StopAsyncIteration, FileNotFoundError):
+                        errors.append(f"{report['_id']}: {fmt} file is missing")
+                        continue
+
+                    async def entry_chunks(first=first, chunks=chunks):
+                        yield first
+                        async for chunk in chunks:
+                            yield chunk
+
+                    async for data in archive.add(export_entry_name(report, fmt), entry_chunks()):
+                        yield data
+        if errors:
+            async def error_chunks():
+                yield "\n".join(errors).encode("utf-8")
+            async for data in archive.add("errors.txt", error_chunks()):
+                yield data
+        yield archive.close()
+    finally:
+        # Client went away: stop waiting (renders already queued still finish and are cached)
+        for task in pending:
+            task.cancel()
+
+@app.get("/api/reports/export")
+async def export_reports(
+    user_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    ids: Optional[List[str]] = Query(None),
+    format: List[str] = Query(["pdf"]),
+):
+    """
+    Download many reports as one ZIP file
+
+    Filter by ``user_id``, a ``created_after``/``created_before`` range
+    and/or repeated ``ids``; repeat ``format`` to get both PDF and DOCX.
+    Files are rendered (or taken from the cache) a few at a time and
+    streamed into the archive as they finish.
+    """
+    formats = check_formats(format)
+    query: Dict[str, Any] = {}
+    if user_id is not None:
+        query["user_id"] = user_id
+    if created_after is not None or created_before is not None:
+        query["created_at"] = {}
+        if created_after is not None:
+            query["created_at"]["$gte"] = created_after
+        if created_before is not None:
+            query["created_at"]["$lt"] = created_before
+    if ids:
+        query["_id"] = {"$in": [parse_object_id(report_id) for report_id in ids]}
+    if not query:
+        raise HTTPException(status_code=400, detail="Filter by user_id, created_after/created_before or ids")
+
+    reports_collection = await get_reports()
+    # Small batches keep memory flat however many reports match
+    reports = reports_collection.find(query, [*REPORT_CONTENT_FIELDS, "updated_at"]) \
+        .sort(REPORT_LIST_SORT).batch_size(EXPORT_CONCURRENCY * 4)
+    filename = f"reports-{utc_now():%Y%m%d-%H%M%S}.zip"
+    return StreamingResponse(
+        stream_export(reports, formats),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Best match first; _id breaks ties between equal scores
+SEARCH_SORT = [("score", -1), ("_id", -1)]
+
+@app.get("/api/reports/search")
+async def search_reports(
+    response: Response,
+    q: str,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    template: Optional[str] = None,
+):
+    """
+    Search titles, authors and sections, best match first
+
+    ``q`` uses MongoDB text search syntax ("exact phrase", -excluded). Pass
+    the ``X-Next-Cursor`` response header back as ``cursor`` for the next
+    page. Each hit carries its relevance ``score`` and highlighted
+    ``snippets``.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    match: Dict[str, Any] = {"$text": {"$search": q}}
+    if user_id is not None:
+        match["user_id"] = user_id
+    if template is not None:
+        match["template"] = template
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if cursor:
+        try:
+            pipeline.append({"$match": keyset_filter(SEARCH_SORT, decode_cursor(cursor))})
+        except (ValueError, KeyError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    pipeline += [
+        {"$sort": dict(SEARCH_SORT)},
+        {"$limit": limit},
+        {"$project": {"references": 0}},
+    ]
+
     reports_collection = await get_reports()
-    reports = await reports_collection.find().skip(skip).limit(limit).to_list(length=limit)
-    return reports
+    reports = await reports_collection.aggregate(pipeline).to_list(length=limit)
+
+    if len(reports) == limit:
+        last = reports[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor({field: last[field] for field, _ in SEARCH_SORT})
+    terms = query_terms(q)
+    results = []
+    for report in reports:
+        summary = {field: report.get(field) for field in REPORT_SUMMARY_FIELDS}
+        summary["_id"] = str(report["_id"])
+        summary["score"] = round(report["score"], 4)
+        summary["snippets"] = build_snippets(report, terms)
+        results.append(summary)
+    return results
 
 @app.get("/api/reports/{report_id}", response_model=Report)
 async def get_report(report_id: str):
     """Get a specific report by ID"""
     reports_collection = await get_reports()
-    try:
-        report = await reports_collection.find_one({"_id": PyObjectId(report_id)})
-        if report is None:
-            raise HTTPException(status_code=404, detail="Report not found")
-        return report
-    except:
-        raise HTTPException(status_code=400, detail="Invalid report ID")
+    report = await reports_collection.find_one({"_id": parse_object_id(report_id)})
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return FastJSONResponse(report_document(report))
+
+# Fields that are required or have a non-null default, so a PATCH may not set them to null
+NON_NULLABLE_FIELDS = [
+    name for name, field in Report.model_fields.items()
+    if name != "id" and (field.is_required() or field.default_factory is not None or field.default is not None)
+]
+
+async def report_conflict(reports_collection, object_id: ObjectId, **detail) -> HTTPException:
+    """A 409 carrying the report's current ``updated_at`` (404 if it was deleted)"""
+    current = await reports_collection.find_one({"_id": object_id}, {"updated_at": 1})
+    if current is None:
+        return HTTPException(status_code=404, detail="Report not found")
+    return HTTPException(
+        status_code=409,
+        detail={"message": "Report was modified by another request",
+                "updated_at": current["updated_at"].isoformat(), **detail},
+    )
+
+@app.patch("/api/reports/{report_id}", response_model=Report)
+async def patch_report(report_id: str, patch: ReportPatch):
+    """
+    Update individual fields of a report
+
+    The write is a single targeted ``$set`` guarded by ``updated_at``; a
+    409 means someone else saved first and the client should reload.
+    """
+    object_id = parse_object_id(report_id)
+    changes = patch.model_dump(exclude_unset=True)
+    expected_updated_at = changes.pop("updated_at")
+    if not changes:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    cleared = [field for field in NON_NULLABLE_FIELDS if field in changes and changes[field] is None]
+    if cleared:
+        raise HTTPException(status_code=400, detail=f"{', '.join(cleared)} cannot be cleared")
+
+    from pymongo import ReturnDocument
+    changes["updated_at"] = utc_now()
+    reports_collection = await get_reports()
+    updated = await reports_collection.find_one_and_update(
+        {"_id": object_id, "updated_at": expected_updated_at},
+        {"$set": changes},
+        return_document=ReturnDocument.AFTER,
+    )
+    if updated is None:
+        raise await report_conflict(reports_collection, object_id)
+    if any(section in changes for section in REPORT_SECTIONS):
+        await index_for_plagiarism([updated])
+    return updated
 
 # AI Endpoints
 @app.post("/api/ai/abstract")
 async def generate_abstract(text: str):
     """Generate an abstract using AI"""
-    prompt = f"""Generate a professional abstract (150-250 words) for a research paper based on the following content.
-    Include the purpose, methodology, findings, and significance of the research.
-
-    Content:
-    {text}
-
-    Abstract:"""
-    
-    abstract = await generate_ai_text(prompt)
+    abstract = await generate_for_endpoint("abstract", text)
     return {"abstract": abstract}
 
 @app.post("/api/ai/conclusion")
 async def generate_conclusion(text: str):
     """Generate a conclusion using AI"""
-    prompt = f"""Write a comprehensive conclusion for a research paper based on the following content.
-    The conclusion should summarize the key findings, discuss their implications, and suggest future research directions.
-
-    Content:
-    {text}
-
-    Conclusion:"""
-    
-    conclusion = await generate_ai_text(prompt)
+    conclusion = await generate_for_endpoint("conclusion", text)
     return {"conclusion": conclusion}
 
 @app.post("/api/ai/reword")
 async def reword_text(text: str):
     """Improve grammar and flow of text"""
-    prompt = f"""Improve the grammar, clarity, and flow of the following academic text while preserving its original meaning.
-    Make it more professional and academic. Do not change the technical terms or specific information.
-
-    Original text:
-    {text}
-
-    Improved version:"""
-    
-    rewritten = await generate_ai_text(prompt)
+    rewritten = await generate_for_endpoint("reword", text)
     return {"rewritten_text": rewritten}
 
 @app.post("/api/ai/synopsis")
 async def generate_synopsis(text: str):
     """Generate a 2-page summary"""
-    prompt = f"""Create a concise 2-page summary (approximately 1000 words) of the following content.
-    Include the main points, methodology, results, and conclusions.
+    synopsis = await generate_for_endpoint("synopsis", text)
+    return {"synopsis": synopsis}
 
-    Content:
-    {text}
+def report_source_text(report: Dict[str, Any], exclude: Optional[str] = None) -> str:
+    """Join a report's title and sections into one text for the AI prompts"""
+    parts = [report.get("title") or ""]
+    for section in REPORT_SECTIONS:
+        if section != exclude and report.get(section):
+            parts.append(f"{section.capitalize()}:\n{report[section]}")
+    return "\n\n".join(part for part in parts if part)
 
-    Summary:"""
-    
-    synopsis = await generate_ai_text(prompt)
-    return {"synopsis": synopsis}
+def resolve_batch_operation(operation: str, report: Dict[str, Any]):
+    """Map a batch operation to (endpoint, target field, input text)"""
+    if operation in ("abstract", "conclusion"):
+        return operation, operation, report_source_text(report, exclude=operation)
+    if operation == "synopsis":
+        return "synopsis", None, report_source_text(report)
+    if operation.startswith("reword:"):
+        section = operation.split(":", 1)[1]
+        if section not in REPORT_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown section: {section}")
+        if not report.get(section):
+            raise HTTPException(status_code=400, detail=f"Section is empty: {section}")
+        return "reword", section, report[section]
+    raise HTTPException(status_code=400, detail=f"Unknown operation: {operation}")
+
+async def run_batch_operation(endpoint: str, text: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        output = await get_ai_cache().get_or_compute(
+            endpoint_cache_key(endpoint, text), endpoint_compute(endpoint, text, priority=PRIORITY_BULK)
+        )
+        result = {"text": output}
+    except QuotaExceeded as e:
+        result = {"error": "AI quota exceeded, retry later", "retry_after": math.ceil(e.retry_after)}
+    except asyncio.TimeoutError:
+        result = {"error": "AI generation timed out"}
+    except Exception as e:
+        print(f"Error generating AI text: {e}")
+        result = {"error": f"Error generating content: {str(e)}"}
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+@app.post("/api/ai/batch")
+async def run_ai_batch(batch: AIBatchRequest):
+    """Run several AI operations for a report concurrently and save the results"""
+    if not batch.operations:
+        raise HTTPException(status_code=400, detail="No operations requested")
+
+    started = time.perf_counter()
+    report = await load_report_source(batch.report_id, batch.report)
+
+    operations = list(dict.fromkeys(batch.operations))
+    plans = [resolve_batch_operation(operation, report) for operation in operations]
+    outputs = await asyncio.gather(*[run_batch_operation(endpoint, text) for endpoint, _, text in plans])
+
+    results = {}
+    updates = {}
+    for operation, (_, field, _), output in zip(operations, plans, outputs):
+        output["field"] = field
+        results[operation] = output
+        if field and "text" in output:
+            updates[field] = output["text"]
+
+    updated = False
+    if batch.report_id is not None and updates:
+        # Only save over the version the operations were run on
+        updates["updated_at"] = utc_now()
+        reports_collection = await get_reports()
+        saved = await reports_collection.update_one(
+            {"_id": report["_id"], "updated_at": report.get("updated_at")}, {"$set": updates}
+        )
+        if saved.matched_count == 0:
+            # Hand back the generated text so the client can apply it to the newer version
+            raise await report_conflict(reports_collection, report["_id"], results=results)
+        updated = True
+        await index_for_plagiarism([{**report, **updates}])
+
+    return {
+        "report_id": batch.report_id,
+        "results": results,
+        "updated": updated,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+# Plagiarism endpoints
+@app.post("/api/plagiarism/check")
+async def check_plagiarism_local(text: str, top_k: int = 5, report_id: Optional[str] = None,
+                                 external: bool = False):
+    """
+    Find stored reports that share passages with the text
+
+    Matches come from the local MinHash index, ranked by how much of the
+    text they cover. Pass ``report_id`` to leave the report being checked
+    out of the results, and ``external=true`` to also run the paid web scan.
+    """
+    exclude_id = parse_object_id(report_id) if report_id else None
+    started = time.perf_counter()
+    matches = await get_similarity_index().query(text, top_k=max(1, min(top_k, 50)), exclude_id=exclude_id)
+    result = {"matches": matches}
+    if external:
+        result["external"] = await check_plagiarism(text)
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+@app.post("/api/plagiarism/reindex")
+async def reindex_plagiarism(batch_size: int = 200):
+    """Rebuild the plagiarism index for every stored report (run once after upgrading)"""
+    reports_collection = await get_reports()
+    index = get_similarity_index()
+    indexed = 0
+    batch = []
+    async for report in reports_collection.find({}, ["user_id", *REPORT_SECTIONS]):
+        batch.append(report)
+        if len(batch) >= batch_size:
+            await index.index_reports(batch)
+            indexed += len(batch)
+            batch = []
+    await index.index_reports(batch)
+    indexed += len(batch)
+    return {"indexed": indexed}
+
+@app.post("/api/ai/{endpoint}/stream")
+async def stream_ai_endpoint(endpoint: str, text: str, request: Request, format: str = "sse"):
+    """Stream any AI endpoint as Server-Sent Events (format=sse) or JSON lines (format=ndjson)"""
+    if endpoint not in PROMPT_TEMPLATES:
+        raise HTTPException(status_code=404, detail="Unknown AI endpoint")
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_for_endpoint(endpoint, text, request, format),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/ai/stats")
+async def ai_stats():
+    """Concurrency, queue-depth, quota and cache metrics for the AI endpoints"""
+    stats = get_ai_client().stats()
+    stats["cache"] = get_ai_cache().stats()
+    return stats
+
+# Report generation endpoints
+def check_formats(formats: List[str]) -> List[str]:
+    formats = list(dict.fromkeys(formats))
+    unsupported = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+    if not formats or unsupported:
+        raise HTTPException(status_code=400, detail=f"Supported formats: {', '.join(SUPPORTED_FORMATS)}")
+    return formats
+
+async def submit_render(report: Dict[str, Any], report_id: Optional[str], formats: List[str]):
+    """Queue rendering of the formats that are not stored yet; returns (cache key, job ID)"""
+    project_data = {field: report.get(field) for field in REPORT_CONTENT_FIELDS}
+    cache = get_artifact_cache()
+    store = get_artifact_store()
+    key = content_hash(project_data)
+    if report_id is not None:
+        stale_key = await asyncio.to_thread(cache.track_report, report_id, report.get("updated_at"), key)
+        if stale_key is not None:
+            await store.delete_prefix(f"{stale_key}.")
+
+    cached = []
+    for fmt in formats:
+        if cache.get(key, fmt) is not None or await store.find(cache.filename(key, fmt)) is not None:
+            cached.append(fmt)
+    if len(cached) < len(formats):
+        await asyncio.to_thread(cache.evict, [key])
+
+    async def publish(rendered: List[str]) -> None:
+        # Copy fresh renders into GridFS so every instance can serve them
+        for fmt in rendered:
+            try:
+                await store.upload_file(cache.path(key, fmt), cache.filename(key, fmt),
+                                        metadata={"key": key, "report_id": report_id})
+            except Exception as e:
+                print(f"Failed to store artifact in GridFS: {e}")
+
+    job_id = get_job_manager().submit(
+        project_data, project_data.get("template") or "ieee", formats,
+        basename=key, cached_formats=cached, finalize=publish,
+    )
+    return key, job_id
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def artifact_response(request: Request, filename: str) -> Response:
+    """
+    Serve a rendered file from local disk or GridFS
+
+    Responses carry a strong ETag (304 when the client already has it) and
+    honour single-range ``Range`` requests, streaming in fixed-size chunks.
+    Missing files are a 404 even for ``If-None-Match: *``.
+    """
+    if os.path.basename(filename) != filename or "." not in filename:
+        raise HTTPException(status_code=404, detail="File not found")
+    key, fmt = filename.rsplit(".", 1)
+    cache = get_artifact_cache()
+    path = cache.get(key, fmt)
+    grid_out = None
+    if path is None:
+        grid_out = await get_artifact_store().open(filename)
+        if grid_out is None:
+            raise HTTPException(status_code=404, detail="File not found")
+
+    etag = cache.etag(key, fmt)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Accept-Ranges": "bytes"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if path is not None:
+        # FileResponse handles Range requests itself
+        return FileResponse(path, filename=filename, headers=headers)
+
+    size = grid_out.length
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    status_code = 200
+    if byte_range is not None:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        get_artifact_store().iter_range(grid_out, start, end),
+        status_code=status_code,
+        media_type=CONTENT_TYPES.get(fmt, "application/octet-stream"),
+        headers=headers,
+    )
+
+@app.post("/generate-report", status_code=status.HTTP_202_ACCEPTED)
+async def generate_report(request: GenerateReportRequest):
+    """Queue a report for DOCX/PDF rendering and return the job ID"""
+    formats = check_formats(request.formats)
+    report = await load_report_source(request.report_id, request.report)
+    _, job_id = await submit_render(report, request.report_id, formats)
+    job = get_job_manager().status(job_id)
+    return {"job_id": job_id, "status": job["status"], "status_url": f"/jobs/{job_id}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Report the status of a rendering job (queued/running/done/failed)"""
+    job = get_job_manager().status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "done":
+        job["downloads"] = {fmt: f"/download/{name}" for fmt, name in job["files"].items()}
+    return job
+
+@app.get("/download/{filename}")
+async def download_file(filename: str, request: Request):
+    """Download a generated file"""
+    return await artifact_response(request, filename)
+
+@app.get("/api/reports/{report_id}/download")
+async def download_report(report_id: str, request: Request, format: str = "pdf"):
+    """Download a stored report, rendering it only if no stored copy matches"""
+    fmt = check_formats([format])[0]
+    report = await load_report_source(report_id, None)
+    key, job_id = await submit_render(report, report_id, [fmt])
+    try:
+        with span("render"):
+            files = await get_job_manager().wait(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to render report: {str(e)}")
+    return await artifact_response(request, files[fmt])
+
+def cache_samples():
+    """Hit/miss counters of the in-process caches, read at scrape time"""
+    caches = {"ai": get_ai_cache().stats(), "artifact": get_artifact_cache().stats()}
+    for cache, stats in caches.items():
+        for result in ("hits", "mongo_hits", "misses"):
+            if result in stats:
+                yield (cache, result), stats[result]
+
+def ai_client_samples():
+    client = peek_ai_client()
+    if client is None:
+        return
+    stats = client.stats()
+    for field in ("in_flight", "queued", "max_queued"):
+        yield (field,), stats[field]
+
+registry.callback("cache_requests_total", "Cache lookups by cache and result", "counter",
+                  ["cache", "result"], cache_samples)
+registry.callback("ai_client_requests", "Gemini calls in flight and waiting for a slot", "gauge",
+                  ["state"], ai_client_samples)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this process"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Health check endpoint
 @app.get("/api/health")
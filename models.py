@@ -43,6 +43,49 @@ class Report(ReportBase):
         }
     )
 
+# Sections of a report that hold free text
+REPORT_SECTIONS = ["abstract", "introduction", "methodology", "results", "conclusion"]
+
+# Fields of a report that are rendered into documents
+REPORT_CONTENT_FIELDS = ["title", "authors", *REPORT_SECTIONS, "references", "template"]
+
+# Fields returned by list views (everything except the long section bodies)
+REPORT_SUMMARY_FIELDS = ["title", "authors", "template", "created_at", "updated_at", "user_id"]
+
+class ReportPatch(BaseModel):
+    """Partial update of a report
+
+    Only the fields present in the body are changed (send ``null`` to clear
+    a section). ``updated_at`` must equal the stored value, otherwise the
+    update is rejected as a conflicting edit.
+    """
+    updated_at: datetime
+    title: Optional[str] = None
+    authors: Optional[List[str]] = None
+    abstract: Optional[str] = None
+    introduction: Optional[str] = None
+    methodology: Optional[str] = None
+    results: Optional[str] = None
+    conclusion: Optional[str] = None
+    references: Optional[List[Dict[str, Any]]] = None
+    template: Optional[str] = None
+
+class AIBatchRequest(BaseModel):
+    """Run several AI operations for one report
+
+    Operations are ``abstract``, ``conclusion``, ``synopsis`` or
+    ``reword:<section>`` (e.g. ``reword:introduction``).
+    """
+    report_id: Optional[PyObjectId] = None
+    report: Optional[ReportCreate] = None
+    operations: List[str]
+
+class GenerateReportRequest(BaseModel):
+    """Render a stored report (``report_id``) or an inline ``report`` to files"""
+    report_id: Optional[PyObjectId] = None
+    report: Optional[ReportCreate] = None
+    formats: List[str] = Field(default_factory=lambda: ["docx", "pdf"])
+
 class UserBase(BaseModel):
     email: EmailStr
     full_name: str
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from utils.ai_scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, AIScheduler, QuotaExceeded
+
+
+def test_interactive_calls_overtake_bulk():
+    async def run():
+        scheduler = AIScheduler(1, requests_per_minute=6000, tokens_per_minute=10**9)
+        await scheduler.acquire(10)
+        order = []
+
+        async def call(name, priority):
+            await scheduler.acquire(10, priority)
+            order.append(name)
+            scheduler.release(10, 10, 0.01)
+
+        tasks = [asyncio.create_task(call(f"bulk{i}", PRIORITY_BULK)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("reword", PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        scheduler.release(10, 10, 0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == ["reword", "bulk0", "bulk1", "bulk2"]
+
+
+def test_rejects_when_wait_exceeds_deadline():
+    async def run():
+        # 60 requests per minute refill one per second
+        scheduler = AIScheduler(100, requests_per_minute=60, tokens_per_minute=10**9, deadline=2)
+        for _ in range(60):
+            await scheduler.acquire(1)
+            scheduler.release(1)
+        waiting = [asyncio.create_task(scheduler.acquire(1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(QuotaExceeded) as error:
+            await scheduler.acquire(1)
+        assert error.value.retry_after > 2
+        await asyncio.gather(*waiting)
+        assert scheduler.stats()["rejected"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from utils.artifact_cache import ArtifactCache
+from utils.artifact_store import RangeNotSatisfiable, parse_range
+
+
+def write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_evict_drops_pointers_to_evicted_artifacts(tmp_path):
+    cache = ArtifactCache(directory=str(tmp_path), max_bytes=150)
+    for key, report_id in [("old", "a"), ("new", "b"), ("pending", "c")]:
+        cache.track_report(report_id, "2024-01-01", key)
+    write(cache.path("old", "pdf"), 100)
+    os.utime(cache.path("old", "pdf"), (0, 0))
+    write(cache.path("new", "pdf"), 100)
+
+    cache.evict(rendering=["pending"])
+
+    assert sorted(os.listdir(tmp_path)) == ["new.pdf", "report_b.json", "report_c.json"]
+    with open(tmp_path / "report_b.json") as f:
+        assert json.load(f)["key"] == "new"
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=10-19", 100) == (10, 19)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    # Inverted and multi-part ranges are ignored: the full file is served
+    assert parse_range("bytes=5-3", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=-0", 100)
+
+
+def test_track_report_keeps_keys_other_reports_share(tmp_path):
+    cache = ArtifactCache(directory=str(tmp_path))
+    write(cache.path("shared", "pdf"), 10)
+    assert cache.track_report("a", "v1", "shared") is None
+    assert cache.track_report("b", "v1", "shared") is None
+
+    # Report a changes, but b still renders to the same content
+    assert cache.track_report("a", "v2", "edited") is None
+    assert os.path.exists(cache.path("shared", "pdf"))
+
+    # Once no report points at it, the old key is removed and returned
+    assert cache.track_report("b", "v2", "edited") == "shared"
+    assert not os.path.exists(cache.path("shared", "pdf"))
+
+    # A new updated_at with unchanged content keeps the artifacts
+    write(cache.path("edited", "pdf"), 10)
+    assert cache.track_report("a", "v3", "edited") is None
+    assert os.path.exists(cache.path("edited", "pdf"))
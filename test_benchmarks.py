@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+pytest.importorskip("mongomock_motor")
+
+from benchmarks import run  # noqa: E402
+
+
+def test_benchmark_smoke(tmp_path):
+    """The offline suite runs end to end and writes comparable JSON"""
+    out = tmp_path / "bench.json"
+    args = ["--sizes", "tiny", "--n", "4", "--render-n", "1", "--ai-latency", "0", "--ai-jitter", "0"]
+    assert run.main(args + ["--out", str(out)]) == 0
+
+    results = json.loads(out.read_text())["results"]
+    names = {item["name"] for item in results}
+    assert {"create_report", "list_reports[full]", "ai[reword]", "render[pdf,ieee]"} <= names
+    assert all(item["p99_ms"] >= item["p50_ms"] >= 0 for item in results)
+
+    # A baseline where everything was ten times faster is a regression
+    for item in results:
+        item["p50_ms"] /= 10
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": results}))
+    assert run.compare(json.loads(out.read_text())["results"], str(baseline), 0.25)
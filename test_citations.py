@@ -0,0 +1,61 @@
+from utils.citations import format_references
+
+REFERENCES = [
+    {"authors": ["Jane Q. Doe", "Roe, Richard"], "title": "Deep things", "journal": "J. Stuff",
+     "volume": 12, "issue": 3, "pages": "45-67", "year": 2020},
+    {"authors": "Alan Turing", "title": "Computable numbers", "publisher": "OUP", "year": "1936"},
+    {"citation": "Babbage, C. (1864). Passages from the life of a philosopher."},
+]
+
+
+def test_ieee_is_numbered_in_order():
+    formatted = format_references(REFERENCES, "ieee")
+    assert [ref.label for ref in formatted] == ["[1]", "[2]", "[3]"]
+    assert formatted[0].text == "J. Q. Doe and R. Roe, “Deep things,” J. Stuff, vol. 12, no. 3, pp. 45–67, 2020."
+    assert formatted[0].segments[1] == ("J. Stuff", True)
+    assert formatted[1].text == "A. Turing, Computable numbers. OUP, 1936."
+    # Preformatted citations are kept as they are
+    assert formatted[2].text == REFERENCES[2]["citation"]
+
+
+def test_springer_is_sorted_by_author():
+    formatted = format_references(REFERENCES, "springer")
+    assert [ref.label for ref in formatted] == ["", "", ""]
+    assert [ref.text for ref in formatted] == [
+        REFERENCES[2]["citation"],
+        "Doe JQ, Roe R (2020) Deep things. J. Stuff 12(3):45–67",
+        "Turing A (1936) Computable numbers. OUP",
+    ]
+
+
+def test_missing_fields_and_empty_references():
+    references = [
+        {"authors": ["Jane Doe"], "title": "Only a title"},
+        {},
+        {"citation": ""},
+        {"title": "No authors", "year": 2001},
+    ]
+    formatted = format_references(references, "ieee")
+    # Empty references are dropped rather than numbered
+    assert [ref.label for ref in formatted] == ["[1]", "[2]"]
+    # The title's comma becomes the final period when nothing follows it
+    assert formatted[0].text == "J. Doe, “Only a title.”"
+    assert formatted[1].text == "“No authors,” 2001."
+    assert [ref.text for ref in format_references(references, "springer")] == [
+        "(2001) No authors.",
+        "Doe J Only a title.",
+    ]
+
+
+def test_dict_authors_and_et_al():
+    many = [{"given": f"Given{i}", "family": f"Family{i}"} for i in range(7)]
+    references = [
+        {"authors": [{"given": "Ada", "family": "Lovelace"}], "title": "Notes", "year": 1843},
+        {"authors": many, "title": "Large team", "journal": "J", "year": 2021},
+    ]
+    ieee = format_references(references, "ieee")
+    assert ieee[0].text == "A. Lovelace, “Notes,” 1843."
+    assert ieee[1].text == "G. Family0 et al., “Large team,” J, 2021."
+    springer = format_references(references, "springer")
+    assert springer[0].text == "Family0 G, Family1 G, Family2 G et al (2021) Large team. J"
+    assert springer[1].text == "Lovelace A (1843) Notes."
@@ -0,0 +1,76 @@
+from docx import Document
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from utils.extraction import build_report, detect_format, heading_section, iter_docx_blocks, iter_pdf_blocks
+
+
+def test_heading_section():
+    assert heading_section("II. MATERIALS AND METHODS") == "methodology"
+    assert heading_section("4.1 Results:") == "results"
+    assert heading_section("Related Work") is None
+    assert heading_section("B) Summary") == "abstract"
+    # A bare capital letter is only numbering when followed by '.' or ')'
+    assert heading_section("A summary") is None
+
+
+def test_docx_sections(tmp_path):
+    document = Document()
+    document.add_heading("A Study of Things", 0)
+    document.add_heading("Abstract", 1)
+    document.add_paragraph("We study things.")
+    document.add_heading("1. Introduction", 1)
+    document.add_paragraph("Things matter.")
+    document.add_heading("2. Related Work", 1)
+    document.add_paragraph("Others did too.")
+    document.add_heading("Conclusions", 1)
+    document.add_paragraph("Done.")
+    document.add_heading("References", 1)
+    document.add_paragraph("[1] A. Author, A Paper, 2020.")
+    path = tmp_path / "report.docx"
+    document.save(path)
+
+    assert detect_format(path.read_bytes()[:8]) == "docx"
+    report = build_report(iter_docx_blocks(str(path)))
+    assert report["title"] == "A Study of Things"
+    assert report["abstract"] == "We study things."
+    # Unrecognized headings stay in the current section
+    assert report["introduction"] == "Things matter.\n\n2. Related Work\n\nOthers did too."
+    assert report["conclusion"] == "Done."
+    assert report["references"] == [{"citation": "[1] A. Author, A Paper, 2020."}]
+    assert report["headings"] == ["abstract", "introduction", "conclusion", "references"]
+
+
+def test_pdf_sections(tmp_path):
+    path = tmp_path / "report.pdf"
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    lines = [
+        "A Study of Things",
+        "Abstract",
+        "We study things that are found in large numbers across the world and in",
+        "many other places, with a method that is careful and well docu-",
+        "mented.",
+        "A second paragraph.",
+        "1. Introduction",
+        "Things matter.",
+    ]
+    for number, line in enumerate(lines):
+        pdf.drawString(72, 800 - 14 * number, line)
+    pdf.save()
+
+    assert detect_format(path.read_bytes()[:8]) == "pdf"
+    blocks = list(iter_pdf_blocks(str(path)))
+    assert blocks == [
+        ("paragraph", "A Study of Things"),
+        ("heading", "Abstract"),
+        # Wrapped lines are joined and the hyphenated break is undone
+        ("paragraph", "We study things that are found in large numbers across the world and in "
+                      "many other places, with a method that is careful and well documented."),
+        ("paragraph", "A second paragraph."),
+        ("heading", "1. Introduction"),
+        ("paragraph", "Things matter."),
+    ]
+    report = build_report(iter(blocks))
+    assert report["title"] == "A Study of Things"
+    assert report["abstract"].endswith("well documented.\n\nA second paragraph.")
+    assert report["introduction"] == "Things matter."
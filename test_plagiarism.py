@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import httpx
+
+from utils.plagiarism import PlagiarismClient, split_chunks
+
+
+def make_stand_in(calls):
+    """A local stand-in for the plagiarism API: fails each chunk once with 503, then scores it"""
+    seen = set()
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        text = json.loads(request.content)["text"]
+        calls.append(text)
+        if text not in seen:
+            seen.add(text)
+            return httpx.Response(503, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={
+            "score": 50 if "copied" in text else 0,
+            "sources": [{"url": "https://example.com/source"}] if "copied" in text else [],
+        })
+
+    return httpx.MockTransport(handle)
+
+
+def test_chunked_scan():
+    paragraphs = [f"Paragraph {i} " + "words " * 150 for i in range(20)]
+    paragraphs[3] += " copied"
+    text = "\n\n".join(paragraphs)
+
+    async def run():
+        calls = []
+        client = PlagiarismClient(api_url="http://stand-in/check", api_key="test", transport=make_stand_in(calls))
+        try:
+            first = await client.check(text)
+            scanned = len(calls)
+            second = await client.check(text)
+            assert len(calls) == scanned
+
+            # Editing one paragraph only re-scans the chunk that contains it
+            paragraphs[15] = paragraphs[15].replace("words", "terms", 1)
+            third = await client.check("\n\n".join(paragraphs))
+        finally:
+            await client.aclose()
+        return first, second, third, calls, scanned
+
+    first, second, third, calls, scanned = asyncio.run(run())
+    chunks = split_chunks(text)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 4000 for chunk in chunks)
+    assert first["status"] == "success"
+    assert scanned == 2 * len(chunks)  # one retry per chunk
+    assert 0 < first["score"] < 50
+    assert first["sources"] == [{"url": "https://example.com/source"}]
+    assert all(chunk["cached"] for chunk in second["chunks"])
+    assert sum(not chunk["cached"] for chunk in third["chunks"]) == 1
+    assert len(calls) == scanned + 2
+
+
+def test_long_retry_after_fails_chunk():
+    calls = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(429, headers={"Retry-After": "3600"})
+
+    async def run():
+        client = PlagiarismClient(api_url="http://stand-in/check", api_key="test",
+                                  transport=httpx.MockTransport(handle), max_backoff=1)
+        try:
+            return await asyncio.wait_for(client.check("Some text to scan."), timeout=5)
+        finally:
+            await client.aclose()
+
+    result = asyncio.run(run())
+    # The chunk fails at once instead of sleeping for an hour
+    assert result["status"] == "error"
+    assert "3600" in result["chunks"][0]["error"]
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    test_chunked_scan()
+    test_long_retry_after_fails_chunk()
+    print("ok")
@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+pytest.importorskip("mongomock_motor")
+
+import main  # noqa: E402
+from benchmarks.fakes import install_database  # noqa: E402
+from utils.artifact_cache import ArtifactCache  # noqa: E402
+from utils.artifact_store import ArtifactStore  # noqa: E402
+
+REPORT = {"title": "Report", "authors": ["Author"], "introduction": "Intro", "template": "springer"}
+
+
+def run_with_client(test):
+    """Run ``test(client, db)`` against the app backed by an in-memory database"""
+    async def run():
+        db = install_database()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await test(client, db)
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("field", ["title", "authors", "references", "template"])
+def test_patch_rejects_null_for_fields_with_defaults(field):
+    async def test(client, db):
+        created = (await client.post("/api/reports/", json=REPORT)).json()
+        response = await client.patch(f"/api/reports/{created['_id']}",
+                                      json={"updated_at": created["updated_at"], field: None})
+        assert response.status_code == 400
+        assert field in response.json()["detail"]
+
+        stored = (await client.get(f"/api/reports/{created['_id']}")).json()
+        assert stored == created
+
+    run_with_client(test)
+
+
+def test_patch_clears_sections_and_detects_conflicts():
+    async def test(client, db):
+        created = (await client.post("/api/reports/", json=REPORT)).json()
+        url = f"/api/reports/{created['_id']}"
+
+        response = await client.patch(url, json={"updated_at": created["updated_at"], "introduction": None})
+        assert response.status_code == 200
+        updated = response.json()
+        assert updated["introduction"] is None
+        assert updated["updated_at"] != created["updated_at"]
+
+        # A second editor still holding the old version gets a 409 with the current stamp
+        response = await client.patch(url, json={"updated_at": created["updated_at"], "title": "Other"})
+        assert response.status_code == 409
+        assert response.json()["detail"]["updated_at"] == updated["updated_at"]
+        assert (await client.get(url)).json()["title"] == "Report"
+
+    run_with_client(test)
+
+
+class EmptyBucket:
+    """GridFS bucket with no files (mongomock has no GridFS)"""
+
+    async def open_download_stream_by_name(self, filename):
+        raise FileNotFoundError(filename)
+
+
+def test_if_none_match_star_is_404_for_missing_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "get_artifact_store", lambda: ArtifactStore(EmptyBucket))
+    monkeypatch.setattr(main, "get_artifact_cache", lambda: cache)
+    cache = ArtifactCache(directory=str(tmp_path))
+    with open(cache.path("present", "pdf"), "wb") as f:
+        f.write(b"%PDF-")
+
+    async def test(client, db):
+        response = await client.get("/download/missing.pdf", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+        response = await client.get("/download/present.pdf", headers={"If-None-Match": "*"})
+        assert response.status_code == 304
+
+    run_with_client(test)
+
+
+def test_batch_does_not_overwrite_a_newer_version(monkeypatch):
+    async def test(client, db):
+        created = (await client.post("/api/reports/", json=REPORT)).json()
+        url = f"/api/reports/{created['_id']}"
+
+        async def edit_while_generating(endpoint, text):
+            # Another editor saves while the AI operation runs
+            await client.patch(url, json={"updated_at": created["updated_at"], "abstract": "Edited"})
+            return {"text": "Generated"}
+
+        monkeypatch.setattr(main, "run_batch_operation", edit_while_generating)
+        response = await client.post("/api/ai/batch", json={"report_id": created["_id"], "operations": ["abstract"]})
+        assert response.status_code == 409
+        stored = (await client.get(url)).json()
+        assert response.json()["detail"]["updated_at"] == stored["updated_at"]
+        assert response.json()["detail"]["results"]["abstract"]["text"] == "Generated"
+        assert stored["abstract"] == "Edited"
+
+    run_with_client(test)
+
+
+def test_bulk_create_reports_format_error_last():
+    async def test(client, db):
+        body = '[{"title": "One", "authors": ["A"]}, {"title": "Two"}, {"title": "Three", "authors": ["C"]} {'
+        response = await client.post("/api/reports/bulk", content=body,
+                                     headers={"content-type": "application/json"})
+        assert response.status_code == 200
+        result = response.json()
+        assert result["inserted"] == 2
+        assert [item.get("index") for item in result["items"]] == [0, 1, 2, None]
+        assert "id" in result["items"][0] and "error" in result["items"][1]
+        assert "error" in result["items"][-1]
+
+    run_with_client(test)
+
+
+def test_summary_view_leaves_out_unprojected_fields():
+    async def test(client, db):
+        await client.post("/api/reports/", json={**REPORT, "references": [{"citation": "A ref"}]})
+        for params in ({"view": "summary"}, {"view": "summary", "format": "ndjson"}):
+            response = await client.get("/api/reports/", params=params)
+            if params.get("format") == "ndjson":
+                rows = [json.loads(line) for line in response.text.splitlines()]
+            else:
+                rows = response.json()
+            assert set(rows[0]) == {"_id", *main.REPORT_SUMMARY_FIELDS}
+            assert rows[0]["title"] == "Report"
+
+        full = (await client.get("/api/reports/")).json()
+        assert full[0]["introduction"] == "Intro"
+        assert full[0]["references"] == [{"citation": "A ref"}]
+
+    run_with_client(test)
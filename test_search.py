@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter
+from utils.search import build_snippets, query_terms
+
+
+def test_query_terms():
+    assert query_terms('Neural "Graph Networks" -survey networks') == ["neural", "graph", "networks"]
+    assert query_terms("-only -negated") == []
+
+
+def test_snippets_highlight_terms_and_stems():
+    report = {
+        "title": "Learning graph embeddings",
+        "authors": ["Ada Lovelace"],
+        "introduction": "word " * 100 + "We keep learning that graphs help. " + "word " * 100,
+        "results": "Nothing relevant here.",
+    }
+    snippets = build_snippets(report, query_terms("graph learning"))
+    assert [snippet["field"] for snippet in snippets] == ["title", "introduction"]
+
+    title = snippets[0]
+    assert [title["text"][start:end] for start, end in title["highlights"]] == ["Learning", "graph"]
+
+    # Long fields are cut around the first match, on a word boundary, with ellipses
+    intro = snippets[1]
+    assert intro["text"].startswith("…word ") and intro["text"].endswith("…")
+    assert len(intro["text"]) <= 160 + 2
+    assert [intro["text"][start:end] for start, end in intro["highlights"]] == ["learning", "graphs"]
+
+    assert build_snippets(report, []) == []
+    assert build_snippets(report, ["absent"]) == []
+
+
+def test_search_cursor_pages_through_score_ties():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import main
+
+    async def run():
+        collection = mongomock_motor.AsyncMongoMockClient().get_database("search_test").reports
+        # Many hits share a score, so paging must fall back to _id to stay stable
+        documents = [{"_id": ObjectId(), "score": score} for score in [2.0] * 5 + [1.5] * 4 + [1.0] * 3]
+        await collection.insert_many(documents)
+
+        seen = []
+        cursor = None
+        while True:
+            pipeline = [{"$match": keyset_filter(main.SEARCH_SORT, decode_cursor(cursor))}] if cursor else []
+            pipeline += [{"$sort": dict(main.SEARCH_SORT)}, {"$limit": 5}]
+            page = await collection.aggregate(pipeline).to_list(length=5)
+            seen.extend(page)
+            if len(page) < 5:
+                break
+            cursor = encode_cursor({field: page[-1][field] for field, _ in main.SEARCH_SORT})
+        expected = sorted(documents, key=lambda document: (document["score"], document["_id"]), reverse=True)
+        assert [document["_id"] for document in seen] == [document["_id"] for document in expected]
+
+    asyncio.run(run())
+
+
+def test_search_rejects_bad_cursor():
+    pytest.importorskip("mongomock_motor")
+    import httpx
+    import main
+    from benchmarks.fakes import install_database
+
+    async def run():
+        install_database()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for cursor in ("not a cursor", encode_cursor({"score": 1.0})):
+                response = await client.get("/api/reports/search", params={"q": "graph", "cursor": cursor})
+                assert response.status_code == 400
+                assert response.json()["detail"] == "Invalid cursor"
+            response = await client.get("/api/reports/search", params={"q": "  "})
+            assert response.status_code == 400
+
+    asyncio.run(run())
@@ -0,0 +1,80 @@
+import asyncio
+import random
+
+import pytest
+from bson import ObjectId
+
+from utils.similarity import MATCH_THRESHOLD, SimilarityIndex, estimate_similarity, minhash_signature, shingles
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+VOCABULARY = [f"word{i}" for i in range(2000)]
+
+
+def text(seed, words=240):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def run_with_index(test):
+    async def run():
+        db = mongomock_motor.AsyncMongoMockClient().get_database("similarity_test")
+        await test(SimilarityIndex(db.report_signatures, db.reports), db)
+
+    asyncio.run(run())
+
+
+async def store(index, db, **sections):
+    report = {"_id": ObjectId(), "title": "Report", **sections}
+    await db.reports.insert_one(report)
+    await index.index_reports([report])
+    return report
+
+
+def test_signatures_estimate_overlap():
+    original = text(1).split()
+    edited = list(original)
+    edited[100:105] = ["changed"] * 5
+    same = minhash_signature(shingles(original))
+    assert estimate_similarity(same, minhash_signature(shingles(original))) == 1
+    assert estimate_similarity(same, minhash_signature(shingles(edited))) > 0.7
+    assert estimate_similarity(same, minhash_signature(shingles(text(2).split()))) < MATCH_THRESHOLD
+
+
+def test_query_finds_near_duplicates_only():
+    async def test(index, db):
+        source = await store(index, db, introduction=text(1), results=text(2))
+        await store(index, db, introduction=text(3))
+
+        near_duplicate = text(1).replace("word1 ", "changed ", 3)
+        matches = await index.query(near_duplicate)
+        assert [match["report_id"] for match in matches] == [str(source["_id"])]
+        assert matches[0]["similarity"] >= MATCH_THRESHOLD
+        assert matches[0]["coverage"] == 1
+        assert matches[0]["passages"][0]["section"] == "introduction"
+
+        assert await index.query(text(4)) == []
+        # The report being checked can be left out
+        assert await index.query(near_duplicate, exclude_id=source["_id"]) == []
+
+    run_with_index(test)
+
+
+def test_reindexing_replaces_signatures():
+    async def test(index, db):
+        report = await store(index, db, introduction=text(1))
+        assert len(await index.query(text(1))) == 1
+
+        # Updating a report replaces its passages
+        report["introduction"] = text(5)
+        await index.index_reports([report])
+        assert await index.query(text(1)) == []
+        assert len(await index.query(text(5))) == 1
+
+        # Clearing its sections removes it from the index
+        report["introduction"] = None
+        await index.index_reports([report])
+        assert await index.query(text(5)) == []
+        assert await db.report_signatures.count_documents({"report_id": report["_id"]}) == 0
+
+    run_with_index(test)
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+# Cold starts pay for every import in main; keep the heavy SDKs out of it
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+LAZY_MODULES = ["google.generativeai", "motor", "pymongo", "docx", "reportlab"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure_import():
+    """Import main in a fresh interpreter, as a cold start would"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_heavy_modules_load_lazily():
+    assert measure_import()["loaded"] == []
+
+
+def test_import_time_budget():
+    # Best of three to ignore a cold disk cache
+    seconds = min(measure_import()["seconds"] for _ in range(3))
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import main took {seconds:.2f}s"
+
+
+if __name__ == "__main__":
+    result = measure_import()
+    print(f"import main: {result['seconds']:.3f}s, heavy modules loaded: {result['loaded'] or 'none'}")
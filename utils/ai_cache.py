@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1024"))
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+AI_CACHE_MONGO = os.getenv("AI_CACHE_MONGO", "false").lower() in ("1", "true", "yes")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize input so trivially different copies share a cache entry"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def make_cache_key(endpoint: str, template_version: str, model_name: str, text: str) -> str:
+    """
+    Build a content-addressed cache key
+
+    Args:
+        endpoint: Name of the AI endpoint (e.g. 'abstract')
+        template_version: Version of the prompt template used by the endpoint
+        model_name: Name of the model generating the text
+        text: The user supplied input text
+
+    Returns:
+        A hex digest identifying the request
+    """
+    text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    raw = "\x1f".join([endpoint, template_version, model_name, text_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class AICache:
+    """Two-tier response cache with single-flight deduplication"""
+
+    def __init__(self, maxsize: int = AI_CACHE_SIZE, ttl: float = AI_CACHE_TTL_SECONDS,
+                 collection_getter: Optional[Callable[[], Any]] = None):
+        self.local = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.collection_getter = collection_getter
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.collapsed = 0
+
+    def _collection(self):
+        if self.collection_getter is None:
+            return None
+        try:
+            return self.collection_getter()
+        except Exception:
+            # Database not connected yet
+            return None
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        collection = self._collection()
+        if collection is not None:
+            try:
+                doc = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                print(f"AI cache lookup failed: {e}")
+                doc = None
+            if doc is not None:
+                self.mongo_hits += 1
+                self.local.set(key, doc["value"])
+                return doc["value"]
+
+        self.misses += 1
+        value = await compute()
+        await self.put(key, value)
+        return value
+
+    def peek(self, key: str) -> Optional[str]:
+        """Return a value from the in-process tier without computing it"""
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+        return value
+
+    async def put(self, key: str, value: str) -> None:
+        """Store a value in every enabled tier"""
+        self.local.set(key, value)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            await collection.replace_one(
+                {"_id": key},
+                {"_id": key, "value": value,
+                 "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"AI cache write failed: {e}")
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached value for ``key`` or compute it once
+
+        Concurrent callers asking for the same key share a single call to
+        ``compute``. Failures are not cached.
+        """
+        value = self.peek(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.collapsed += 1
+        # Shield so a cancelled caller does not cancel the shared upstream call
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the cache"""
+        return {
+            "size": len(self.local),
+            "hits": self.hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._inflight),
+            "mongo_enabled": self.collection_getter is not None,
+        }
+
+
+_cache: Optional[AICache] = None
+
+
+def get_ai_cache() -> AICache:
+    """Return the process-wide AI response cache"""
+    global _cache
+    if _cache is None:
+        getter = None
+        if AI_CACHE_MONGO:
+            from database import get_ai_cache_collection
+            getter = get_ai_cache_collection
+        _cache = AICache(collection_getter=getter)
+    return _cache
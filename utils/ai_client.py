@@ -0,0 +1,234 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from utils.ai_scheduler import (
+    PRIORITY_INTERACTIVE, PRIORITY_NORMAL, AIScheduler, QuotaExceeded, is_rate_limited,
+)
+from utils.metrics import AI_LATENCY, AI_REJECTED, record_span, record_usage
+from utils.summarizer import estimate_tokens
+
+# Load environment variables
+load_dotenv()
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "60"))
+# Expected reply length, charged against the tokens-per-minute budget up front
+AI_OUTPUT_TOKENS_ESTIMATE = int(os.getenv("AI_OUTPUT_TOKENS_ESTIMATE", "1000"))
+AI_RATE_LIMIT_RETRIES = int(os.getenv("AI_RATE_LIMIT_RETRIES", "2"))
+
+if not GEMINI_API_KEY:
+    print("Warning: GEMINI_API_KEY not found in environment variables")
+
+
+def used_tokens(response) -> Optional[int]:
+    """Prompt plus completion tokens from a response's usage metadata, if reported"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    counts = [getattr(usage, field, None) for field in ("prompt_token_count", "candidates_token_count")]
+    if not any(counts):
+        return None
+    return sum(count or 0 for count in counts)
+
+
+class AIClient:
+    """Non-blocking Gemini client admitted through a quota-aware scheduler"""
+
+    def __init__(self, model, max_concurrency: int = AI_MAX_CONCURRENCY,
+                 timeout: float = AI_TIMEOUT_SECONDS, scheduler: Optional[AIScheduler] = None,
+                 rate_limit_retries: int = AI_RATE_LIMIT_RETRIES):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.scheduler = scheduler or AIScheduler(max_concurrency)
+        self.rate_limit_retries = rate_limit_retries
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.rate_limited = 0
+        self.total_latency = 0.0
+
+    async def _acquire(self, tokens: int, priority: int) -> None:
+        try:
+            await self.scheduler.acquire(tokens, priority)
+        except QuotaExceeded:
+            AI_REJECTED.inc(reason="deadline")
+            raise
+
+    def _release(self, started: float, kind: str, outcome: str, tokens: int, response=None) -> None:
+        elapsed = time.perf_counter() - started
+        self.total_latency += elapsed
+        self.scheduler.release(tokens, used_tokens(response), elapsed)
+        AI_LATENCY.observe(elapsed, kind=kind, outcome=outcome)
+        record_span("ai", elapsed)
+
+    def _rate_limited(self, error: Exception, final: bool) -> None:
+        """Pause the scheduler after a 429 and raise QuotaExceeded once retries are used up"""
+        self.rate_limited += 1
+        retry_after = self.scheduler.backoff()
+        if final:
+            AI_REJECTED.inc(reason="rate_limited")
+            raise QuotaExceeded(retry_after, "AI quota exceeded, retry later") from error
+        print(f"Gemini rate limit hit, retrying in {retry_after:.0f}s")
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None,
+                       priority: int = PRIORITY_NORMAL, **kwargs) -> str:
+        """
+        Generate text for a prompt without blocking the event loop
+
+        Args:
+            prompt: The prompt to send to the model
+            timeout: Seconds to wait for the model (defaults to the client timeout)
+            priority: Scheduling priority (``PRIORITY_*``; lower runs first)
+            **kwargs: Extra arguments passed to ``generate_content_async``
+
+        Returns:
+            The generated text
+
+        Raises:
+            asyncio.TimeoutError: If the model does not answer in time
+            QuotaExceeded: If the call cannot start before the queue deadline
+                or the model keeps answering 429
+        """
+        tokens = estimate_tokens(prompt) + AI_OUTPUT_TOKENS_ESTIMATE
+        for attempt in range(self.rate_limit_retries + 1):
+            await self._acquire(tokens, priority)
+            started = time.perf_counter()
+            response = None
+            outcome = "cancelled"
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, **kwargs),
+                    timeout=timeout or self.timeout,
+                )
+                text = response.text
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                outcome = "timeout"
+                raise
+            except Exception as e:
+                if not is_rate_limited(e):
+                    self.failed += 1
+                    outcome = "error"
+                    raise
+                outcome = "rate_limited"
+                self._rate_limited(e, final=attempt == self.rate_limit_retries)
+            else:
+                self.completed += 1
+                outcome = "ok"
+                self.scheduler.reset_backoff()
+                record_usage(response)
+                return text
+            finally:
+                self._release(started, "generate", outcome, tokens, response)
+
+    async def stream(self, prompt: str, timeout: Optional[float] = None,
+                     priority: int = PRIORITY_INTERACTIVE, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream generated text for a prompt chunk by chunk
+
+        ``timeout`` bounds the wait for each chunk rather than the whole
+        completion. Closing or cancelling the iterator stops the upstream
+        stream so abandoned requests no longer consume quota. A 429 is not
+        retried, since part of the reply may already have been sent; it
+        raises QuotaExceeded instead.
+        """
+        timeout = timeout or self.timeout
+        tokens = estimate_tokens(prompt) + AI_OUTPUT_TOKENS_ESTIMATE
+        await self._acquire(tokens, priority)
+        started = time.perf_counter()
+        response = None
+        chunks = None
+        chunk = None
+        outcome = "cancelled"
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, stream=True, **kwargs),
+                timeout=timeout,
+            )
+            chunks = response.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    yield chunk.text
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            outcome = "timeout"
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            if not is_rate_limited(e):
+                self.failed += 1
+                outcome = "error"
+                raise
+            outcome = "rate_limited"
+            self._rate_limited(e, final=True)
+        else:
+            self.completed += 1
+            outcome = "ok"
+            self.scheduler.reset_backoff()
+            # Usage totals arrive with the last chunk
+            if chunk is not None:
+                record_usage(chunk)
+        finally:
+            if chunks is not None and hasattr(chunks, "aclose"):
+                await chunks.aclose()
+            # Cancel the underlying gRPC/HTTP stream if it is still open
+            upstream = getattr(response, "_iterator", None)
+            if upstream is not None and hasattr(upstream, "cancel"):
+                upstream.cancel()
+            self._release(started, "stream", outcome, tokens, chunk)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return concurrency, queue-depth and quota metrics"""
+        finished = self.completed + self.failed + self.timed_out + self.cancelled + self.rate_limited
+        return {
+            "model": self.model.model_name,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "in_flight": self.scheduler.in_flight,
+            "queued": self.scheduler.queued,
+            "max_queued": self.scheduler.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "rate_limited": self.rate_limited,
+            "avg_latency_seconds": self.total_latency / finished if finished else 0.0,
+            "quota": self.scheduler.stats(),
+        }
+
+
+_client: Optional[AIClient] = None
+
+
+def get_ai_client() -> AIClient:
+    """
+    Return the process-wide AI client
+
+    The Gemini SDK takes most of a second to import, so it is loaded on
+    the first AI request rather than on every cold start.
+    """
+    global _client
+    if _client is None:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        _client = AIClient(genai.GenerativeModel(GEMINI_MODEL_NAME))
+    return _client
+
+
+def peek_ai_client() -> Optional[AIClient]:
+    """Return the AI client if it has been created, without loading the SDK"""
+    return _client
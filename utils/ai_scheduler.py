@@ -0,0 +1,226 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Defaults match Gemini 2.5 Flash's paid tier 1 quota
+AI_REQUESTS_PER_MINUTE = float(os.getenv("AI_REQUESTS_PER_MINUTE", "1000"))
+AI_TOKENS_PER_MINUTE = float(os.getenv("AI_TOKENS_PER_MINUTE", "1000000"))
+AI_QUEUE_DEADLINE_SECONDS = float(os.getenv("AI_QUEUE_DEADLINE_SECONDS", "30"))
+AI_BACKOFF_MAX_SECONDS = float(os.getenv("AI_BACKOFF_MAX_SECONDS", "60"))
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0   # reword, streaming
+PRIORITY_NORMAL = 1        # abstract, conclusion
+PRIORITY_BULK = 2          # synopsis, batches, map-reduce chunk summaries
+
+
+class QuotaExceeded(Exception):
+    """Raised when a call cannot be started within the deadline or the model keeps returning 429"""
+
+    def __init__(self, retry_after: float, message: str = "AI quota exceeded"):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Budget refilled continuously at ``per_minute / 60`` units per second"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.level
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (amounts above capacity only need a full bucket)"""
+        missing = min(amount, self.capacity) - self.available(now)
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Give back (positive) or charge (negative) units after the fact; the level may go below zero"""
+        self.level = min(self.capacity, self.level + delta)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "future")
+
+    def __init__(self, priority: int, seq: int, tokens: float, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AIScheduler:
+    """
+    Admission control for model calls
+
+    Calls are started in priority order when the requests-per-minute and
+    tokens-per-minute buckets and the concurrency limit allow. A call whose
+    estimated queueing time exceeds the deadline is rejected up front with
+    QuotaExceeded instead of piling onto the queue, and 429s from the model
+    pause all admissions with exponential backoff.
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: float = AI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = AI_TOKENS_PER_MINUTE,
+                 deadline: float = AI_QUEUE_DEADLINE_SECONDS, backoff_max: float = AI_BACKOFF_MAX_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.deadline = deadline
+        self.backoff_max = backoff_max
+        self.in_flight = 0
+        self.max_queued = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.avg_latency = 0.0
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._queue if not waiter.future.done())
+
+    def _wait_for(self, tokens: float, now: float) -> float:
+        """Seconds until a call of ``tokens`` fits every budget (ignoring concurrency)"""
+        return max(self._paused_until - now, self.requests.time_until(1, now), self.tokens.time_until(tokens, now), 0.0)
+
+    def _admit(self, tokens: float, now: float) -> None:
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        self.in_flight += 1
+
+    def estimated_wait(self, tokens: float, priority: int) -> float:
+        """Rough queueing time for a new call, counting every queued call it would not overtake"""
+        now = time.monotonic()
+        ahead = [w for w in self._queue if w.priority <= priority and not w.future.done()]
+        tokens_ahead = sum(min(w.tokens, self.tokens.capacity) for w in ahead) + min(tokens, self.tokens.capacity)
+        waits = [
+            (tokens_ahead - self.tokens.available(now)) / self.tokens.rate,
+            (len(ahead) + 1 - self.requests.available(now)) / self.requests.rate,
+            (self.in_flight + len(ahead) + 1 - self.max_concurrency) / self.max_concurrency * self.avg_latency,
+        ]
+        return max(self._paused_until - now, 0.0) + max(0.0, *waits)
+
+    async def acquire(self, tokens: float, priority: int = PRIORITY_NORMAL) -> None:
+        """
+        Wait for a slot for a call expected to use ``tokens`` tokens
+
+        Raises:
+            QuotaExceeded: If the call would wait longer than the deadline
+        """
+        now = time.monotonic()
+        if not self.queued and self.in_flight < self.max_concurrency and self._wait_for(tokens, now) == 0:
+            self._admit(tokens, now)
+            return
+
+        wait = self.estimated_wait(tokens, priority)
+        if wait > self.deadline:
+            self.rejected += 1
+            raise QuotaExceeded(retry_after=wait)
+
+        waiter = _Waiter(priority, next(self._seq), tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, waiter)
+        self.max_queued = max(self.max_queued, self.queued)
+        self._kick()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the caller gave up: hand the slot back
+                self.release(tokens, tokens)
+            raise
+
+    def release(self, estimated_tokens: float, used_tokens: Optional[float] = None,
+                elapsed: Optional[float] = None) -> None:
+        """Free a slot, correcting the token budget with the real usage when known"""
+        self.in_flight -= 1
+        if used_tokens is not None:
+            self.tokens.adjust(min(estimated_tokens, self.tokens.capacity) - used_tokens)
+        if elapsed is not None:
+            self.avg_latency = 0.9 * self.avg_latency + 0.1 * elapsed if self.avg_latency else elapsed
+        self._kick()
+
+    def backoff(self) -> float:
+        """Pause admissions after a 429; returns the pause in seconds"""
+        self.rate_limited += 1
+        self._backoff = min(self.backoff_max, self._backoff * 2 if self._backoff else 1.0)
+        self._paused_until = max(self._paused_until, time.monotonic() + self._backoff)
+        self._kick()
+        return self._backoff
+
+    def reset_backoff(self) -> None:
+        self._backoff = 0.0
+
+    def _kick(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._queue and (self._dispatcher is None or self._dispatcher.done()):
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Admit queued calls in priority order as budgets refill"""
+        while self._queue:
+            head = self._queue[0]
+            if head.future.done():
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            wait = self._wait_for(head.tokens, now)
+            if wait == 0 and self.in_flight < self.max_concurrency:
+                heapq.heappop(self._queue)
+                self._admit(head.tokens, now)
+                head.future.set_result(None)
+                continue
+            # Sleep until the budget refills, a slot frees up or a new call arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait or None)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "requests_available": round(self.requests.available(now), 1),
+            "tokens_available": round(self.tokens.available(now)),
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "paused_seconds": round(max(0.0, self._paused_until - now), 2),
+        }
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for the Gemini SDK's 429 (ResourceExhausted) errors, without importing the SDK"""
+    return getattr(error, "code", None) == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
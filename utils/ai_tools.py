@@ -1,16 +1,6 @@
-import os
 from typing import Optional
-import google.generativeai as genai
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-# Configure Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-pro')
+from utils.ai_client import GEMINI_API_KEY, get_ai_client
 
 async def generate_ai_text(prompt: str, max_tokens: int = 500) -> Optional[str]:
     """Generate text using Gemini API"""
@@ -18,8 +8,7 @@ async def generate_ai_text(prompt: str, max_tokens: int = 500) -> Optional[str]:
         return None
     
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await get_ai_client().generate(prompt)
     except Exception as e:
         print(f"Error generating AI text: {e}")
         return None
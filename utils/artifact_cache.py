@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+
+from models import REPORT_CONTENT_FIELDS
+from utils.jobs import OUTPUT_FOLDER, SUPPORTED_FORMATS
+
+# Load environment variables
+load_dotenv()
+
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Bump when the renderers' output changes so cached files are not reused
+RENDER_VERSION = "3"
+
+
+def content_hash(report: Dict[str, Any]) -> str:
+    """Hash the fields of a report that affect its rendered output (including template)"""
+    content = {field: report.get(field) for field in REPORT_CONTENT_FIELDS}
+    content["renderer"] = RENDER_VERSION
+    content["template"] = (content.get("template") or "ieee").lower()
+    raw = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """Size-bounded on-disk LRU of rendered DOCX/PDF files keyed by content hash
+
+    Artifacts live in the render output folder as ``<key>.<format>`` so
+    finished jobs populate the cache directly. The methods touch the disk;
+    call them from async code with ``asyncio.to_thread``.
+    """
+
+    def __init__(self, directory: str = OUTPUT_FOLDER, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def filename(self, key: str, fmt: str) -> str:
+        return f"{key}.{fmt}"
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, self.filename(key, fmt))
+
+    def etag(self, key: str, fmt: str) -> str:
+        """Strong ETag for an artifact"""
+        return f'"{key}-{fmt}"'
+
+    def get(self, key: str, fmt: str) -> Optional[str]:
+        """Return the path of a cached artifact and mark it as recently used"""
+        path = self.path(key, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def _pointer_path(self, report_id: str) -> str:
+        return os.path.join(self.directory, f"report_{report_id}.json")
+
+    def _read_pointer(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                pointer = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return pointer if isinstance(pointer, dict) and "key" in pointer else None
+
+    def _is_referenced(self, key: str) -> bool:
+        """Whether any report pointer still refers to ``key``"""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith("report_") and entry.name.endswith(".json"):
+                    pointer = self._read_pointer(entry.path)
+                    if pointer is not None and pointer["key"] == key:
+                        return True
+        return False
+
+    def track_report(self, report_id: str, updated_at: Any, key: str) -> Optional[str]:
+        """
+        Record which artifact key belongs to a stored report
+
+        When the report's content (and so its key) changed, the artifacts
+        rendered for the previous version are removed and their key is
+        returned so other storage tiers can drop them too. Keys are content
+        hashes, so a key another report still points at is kept.
+        """
+        updated_at = str(updated_at)
+        pointer = self._pointer_path(report_id)
+        previous = self._read_pointer(pointer)
+        if previous is not None and previous["updated_at"] == updated_at and previous["key"] == key:
+            return None
+
+        with open(pointer, "w") as f:
+            json.dump({"updated_at": updated_at, "key": key}, f)
+        if previous is None or previous["key"] == key or self._is_referenced(previous["key"]):
+            return None
+        self.remove(previous["key"])
+        return previous["key"]
+
+    def remove(self, key: str) -> None:
+        """Delete every format rendered for a key"""
+        for fmt in SUPPORTED_FORMATS:
+            try:
+                os.unlink(self.path(key, fmt))
+            except FileNotFoundError:
+                pass
+
+    def evict(self, rendering: Iterable[str] = ()) -> None:
+        """
+        Delete least recently used artifacts until the cache fits in max_bytes
+
+        Report pointers whose artifacts are no longer on disk are removed too,
+        so they do not pile up for reports that are never rendered again.
+
+        Args:
+            rendering: Keys being rendered right now, whose pointers are kept
+        """
+        entries = []
+        pointers = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file() or ".tmp" in entry.name:
+                    continue
+                if entry.name.endswith(".json"):
+                    if entry.name.startswith("report_"):
+                        pointers.append(entry.path)
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        kept = set(rendering)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                kept.add(os.path.basename(path).rsplit(".", 1)[0])
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        for pointer in pointers:
+            target = self._read_pointer(pointer)
+            if target is None or target["key"] not in kept:
+                try:
+                    os.unlink(pointer)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "max_bytes": self.max_bytes}
+
+
+_cache: Optional[ArtifactCache] = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Return the process-wide artifact cache"""
+    global _cache
+    if _cache is None:
+        _cache = ArtifactCache()
+    return _cache
@@ -0,0 +1,133 @@
+import re
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Bytes read from disk / GridFS per step; also the GridFS chunk size
+STREAM_CHUNK_SIZE = 255 * 1024
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header does not overlap the file"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header
+
+    Args:
+        header: The Range header value (or None)
+        size: Total size of the file in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to serve the whole file
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the file
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None:
+        # Multiple or malformed ranges: serving the full body is allowed
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        # An inverted range is invalid, so the header is ignored
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
+
+
+class ArtifactStore:
+    """Rendered files shared by every instance through MongoDB GridFS"""
+
+    def __init__(self, bucket_getter):
+        self.bucket_getter = bucket_getter
+
+    async def find(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Return the GridFS file document for ``filename`` if it exists"""
+        bucket = self.bucket_getter()
+        cursor = bucket.find({"filename": filename}).sort("uploadDate", -1).limit(1)
+        async for grid_out in cursor:
+            return {"_id": grid_out._id, "length": grid_out.length}
+        return None
+
+    async def upload_file(self, path: str, filename: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Copy a file from disk into GridFS chunk by chunk"""
+        bucket = self.bucket_getter()
+        if await self.find(filename) is not None:
+            return
+        fmt = filename.rsplit(".", 1)[-1]
+        metadata = {"contentType": CONTENT_TYPES.get(fmt, "application/octet-stream"), **(metadata or {})}
+        grid_in = bucket.open_upload_stream(filename, chunk_size_bytes=STREAM_CHUNK_SIZE, metadata=metadata)
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+
+    async def delete_prefix(self, prefix: str) -> None:
+        """Delete every stored file whose name starts with ``prefix``"""
+        bucket = self.bucket_getter()
+        cursor = bucket.find({"filename": {"$regex": f"^{re.escape(prefix)}"}})
+        async for grid_out in cursor:
+            await bucket.delete(grid_out._id)
+
+    async def open(self, filename: str):
+        """Open the newest stored version of ``filename`` (None if missing)"""
+        bucket = self.bucket_getter()
+        try:
+            return await bucket.open_download_stream_by_name(filename)
+        except Exception:
+            return None
+
+    @staticmethod
+    async def iter_range(grid_out, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start``..``end`` (inclusive) of a GridFS file in chunks"""
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Return the process-wide GridFS artifact store"""
+    global _store
+    if _store is None:
+        from database import get_artifact_bucket
+        _store = ArtifactStore(get_artifact_bucket)
+    return _store
@@ -0,0 +1,131 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Tuple
+
+# Largest single item we are willing to buffer (MongoDB's document limit)
+MAX_ITEM_BYTES = 16 * 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class BulkFormatError(ValueError):
+    """Raised when the request body cannot be parsed any further"""
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (index, item) for each line of a newline-delimited JSON body
+
+    Lines that are not valid JSON are yielded as (index, ValueError) so the
+    caller can report them without aborting the import.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    index = 0
+    async for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield index, _parse_line(line)
+                index += 1
+        if len(buffer) > MAX_ITEM_BYTES:
+            raise BulkFormatError(f"Item {index} is larger than {MAX_ITEM_BYTES} bytes")
+    buffer += utf8.decode(b"", final=True)
+    if buffer.strip():
+        yield index, _parse_line(buffer)
+
+
+def _parse_line(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield (index, item) for each element of a JSON array body as it arrives
+
+    Only the element currently being parsed is held in memory.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    index = 0
+    started = False
+    after_comma = False
+    finished = False
+    exhausted = False
+    chunks = chunks.__aiter__()
+
+    async def fill() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+            pos = 0
+            return False
+        buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        if len(buffer) > MAX_ITEM_BYTES:
+            raise BulkFormatError(f"Item {index} is larger than {MAX_ITEM_BYTES} bytes")
+        return True
+
+    def skip_whitespace() -> None:
+        nonlocal pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+
+    while not finished:
+        skip_whitespace()
+        if pos >= len(buffer):
+            if not await fill():
+                break
+            continue
+
+        if not started:
+            if buffer[pos] != "[":
+                raise BulkFormatError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            finished = True
+            pos += 1
+            continue
+        if index > 0 and not after_comma:
+            if buffer[pos] != ",":
+                raise BulkFormatError(f"Expected ',' before item {index}")
+            after_comma = True
+            pos += 1
+            continue
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # Probably an incomplete element: read more and try again
+            if await fill():
+                continue
+            raise BulkFormatError(f"Invalid JSON at item {index}")
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(buffer) and not exhausted and not isinstance(item, (dict, list, str)):
+            if await fill():
+                continue
+        pos = end
+        after_comma = False
+        yield index, item
+        index += 1
+
+    if not finished:
+        raise BulkFormatError("Unterminated JSON array")
+    skip_whitespace()
+    if pos < len(buffer) or await fill():
+        skip_whitespace()
+        if pos < len(buffer):
+            raise BulkFormatError("Unexpected data after JSON array")
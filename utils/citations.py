@@ -0,0 +1,331 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from utils.fragment_cache import FragmentCache
+
+# Load environment variables
+load_dotenv()
+
+CITATION_CACHE_SIZE = int(os.getenv("CITATION_CACHE_SIZE", "10000"))
+
+# A formatted reference is a list of (text, italic) runs
+Segments = List[Tuple[str, bool]]
+
+# Per style: how authors are written, whether entries are numbered and
+# sorted, and for each reference type the parts in order as
+# (field, format, italic, separator written before the next present part)
+CITATION_STYLES: Dict[str, Dict[str, Any]] = {
+    "ieee": {
+        "authors": "initials_first",
+        "max_authors": 6,
+        "numbered": True,
+        "sort": None,
+        "end": ".",
+        "types": {
+            "article": [
+                ("authors", "{}", False, ", "),
+                ("title", "\u201c{},\u201d", False, " "),
+                ("journal", "{}", True, ", "),
+                ("volume", "vol. {}", False, ", "),
+                ("issue", "no. {}", False, ", "),
+                ("pages", "pp. {}", False, ", "),
+                ("year", "{}", False, ", "),
+                ("doi", "doi: {}", False, ", "),
+                ("url", "[Online]. Available: {}", False, ", "),
+            ],
+            "inproceedings": [
+                ("authors", "{}", False, ", "),
+                ("title", "\u201c{},\u201d", False, " "),
+                ("booktitle", "in {}", True, ", "),
+                ("year", "{}", False, ", "),
+                ("pages", "pp. {}", False, ", "),
+                ("doi", "doi: {}", False, ", "),
+                ("url", "[Online]. Available: {}", False, ", "),
+            ],
+            "book": [
+                ("authors", "{}", False, ", "),
+                ("title", "{}", True, ". "),
+                ("publisher", "{}", False, ", "),
+                ("year", "{}", False, ", "),
+                ("doi", "doi: {}", False, ", "),
+                ("url", "[Online]. Available: {}", False, ", "),
+            ],
+        },
+    },
+    "springer": {
+        "authors": "family_initials",
+        "max_authors": 3,
+        "numbered": False,
+        "sort": "author_year",
+        "end": "",
+        "types": {
+            "article": [
+                ("authors", "{}", False, " "),
+                ("year", "({})", False, " "),
+                ("title", "{}.", False, " "),
+                ("journal", "{}", False, " "),
+                ("volume", "{}", False, ""),
+                ("issue", "({})", False, ""),
+                ("pages", ":{}", False, ". "),
+                ("doi", "https://doi.org/{}", False, ". "),
+                ("url", "{}", False, ". "),
+            ],
+            "inproceedings": [
+                ("authors", "{}", False, " "),
+                ("year", "({})", False, " "),
+                ("title", "{}.", False, " "),
+                ("booktitle", "In: {}", False, ", "),
+                ("pages", "pp {}", False, ". "),
+                ("doi", "https://doi.org/{}", False, ". "),
+                ("url", "{}", False, ". "),
+            ],
+            "book": [
+                ("authors", "{}", False, " "),
+                ("year", "({})", False, " "),
+                ("title", "{}.", False, " "),
+                ("publisher", "{}", False, ". "),
+                ("doi", "https://doi.org/{}", False, ". "),
+                ("url", "{}", False, ". "),
+            ],
+        },
+    },
+}
+
+# Field names accepted in structured references, mapped to the ones above
+FIELD_ALIASES = {
+    "author": "authors",
+    "container_title": "journal",
+    "container-title": "journal",
+    "number": "issue",
+    "proceedings": "booktitle",
+    "date": "year",
+}
+
+_NAME_SPLIT = re.compile(r"\s+and\s+|;\s*")
+_PAGE_RANGE = re.compile(r"(\d)\s*-{1,2}\s*(\d)")
+_YEAR = re.compile(r"\d{4}")
+
+_formatters: Dict[str, Callable[[Dict[str, Any]], Tuple[Segments, tuple]]] = {}
+_cache = FragmentCache(maxsize=CITATION_CACHE_SIZE)
+
+
+class FormattedReference(NamedTuple):
+    label: str
+    segments: Segments
+
+    @property
+    def text(self) -> str:
+        return "".join(text for text, _ in self.segments)
+
+
+def citation_style(format_style: Optional[str]) -> str:
+    """Citation style used by a report template, defaulting to IEEE"""
+    name = (format_style or "ieee").lower()
+    return name if name in CITATION_STYLES else "ieee"
+
+
+def register_citation_style(name: str, rules: Dict[str, Any]) -> None:
+    """
+    Add or replace a citation style
+
+    Args:
+        name: The style name, matched against reports' ``template`` field
+        rules: Settings with the same keys as the built-in styles
+    """
+    missing = set(CITATION_STYLES["ieee"]) - set(rules)
+    if missing:
+        raise ValueError(f"Citation style '{name}' is missing: {', '.join(sorted(missing))}")
+    CITATION_STYLES[name.lower()] = dict(rules)
+    _formatters.pop(name.lower(), None)
+
+
+def _split_name(name: Any) -> Tuple[str, str]:
+    """Return (given, family) for 'Jane Q. Doe', 'Doe, Jane Q.' or {'given', 'family'}"""
+    if isinstance(name, dict):
+        return str(name.get("given") or ""), str(name.get("family") or name.get("name") or "")
+    name = " ".join(str(name).split())
+    if "," in name:
+        family, given = name.split(",", 1)
+        return given.strip(), family.strip()
+    given, _, family = name.rpartition(" ")
+    return given, family
+
+
+def _initials(given: str, separator: str) -> str:
+    """'Jean-Paul Q.' -> 'J.-P. Q.' (separator ' ') or 'J-PQ' (separator '')"""
+    dot = "." if separator else ""
+    return separator.join(
+        "-".join(part[0] + dot for part in word.split("-") if part)
+        for word in given.replace(".", " ").split()
+    )
+
+
+def _initials_first(names: List[Tuple[str, str]], max_authors: int) -> str:
+    written = [f"{_initials(given, ' ')} {family}".strip() for given, family in names]
+    if len(written) > max_authors:
+        return f"{written[0]} et al."
+    if len(written) <= 2:
+        return " and ".join(written)
+    return ", ".join(written[:-1]) + ", and " + written[-1]
+
+
+def _family_initials(names: List[Tuple[str, str]], max_authors: int) -> str:
+    written = [f"{family} {_initials(given, '')}".strip() for given, family in names]
+    if len(written) > max_authors:
+        return ", ".join(written[:max_authors]) + " et al"
+    return ", ".join(written)
+
+
+AUTHOR_FORMATS = {
+    "initials_first": _initials_first,
+    "family_initials": _family_initials,
+}
+
+
+def _normalize(reference: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply field aliases and parse authors, pages and year of a structured reference"""
+    fields = {FIELD_ALIASES.get(key, key): value for key, value in reference.items() if value not in (None, "", [])}
+    authors = fields.get("authors")
+    if isinstance(authors, str):
+        authors = _NAME_SPLIT.split(authors)
+    fields["authors"] = [_split_name(name) for name in authors or []]
+    if "pages" in fields:
+        fields["pages"] = _PAGE_RANGE.sub("\\1\u2013\\2", str(fields["pages"]))
+    if "year" in fields:
+        match = _YEAR.search(str(fields["year"]))
+        fields["year"] = match.group() if match else str(fields["year"])
+    return fields
+
+
+def _reference_type(fields: Dict[str, Any]) -> str:
+    kind = str(fields.get("type", "")).lower()
+    if kind in ("inproceedings", "conference", "paper-conference", "proceedings"):
+        return "inproceedings"
+    if kind in ("book", "report", "thesis"):
+        return "book"
+    if kind in ("article", "article-journal", "journal"):
+        return "article"
+    if "booktitle" in fields:
+        return "inproceedings"
+    if "publisher" in fields and "journal" not in fields:
+        return "book"
+    return "article"
+
+
+def compile_style(rules: Dict[str, Any]) -> Callable[[Dict[str, Any]], Tuple[Segments, tuple]]:
+    """
+    Turn a style's rules into a function formatting one reference
+
+    The rules are resolved here once: per reference type, each part
+    becomes a (field, prefix, suffix, italic, separator) tuple, so
+    formatting a reference is a single pass over its parts.
+
+    Returns:
+        A function mapping a reference dict to (segments, sort key)
+    """
+    write_authors = AUTHOR_FORMATS[rules["authors"]]
+    max_authors = rules["max_authors"]
+    end = rules["end"]
+    parts_by_type = {}
+    for kind, parts in rules["types"].items():
+        compiled = []
+        for field, template, italic, separator in parts:
+            prefix, _, suffix = template.partition("{}")
+            compiled.append((field, prefix, suffix, italic, separator))
+        parts_by_type[kind] = compiled
+
+    def format_reference(reference: Dict[str, Any]) -> Tuple[Segments, tuple]:
+        # Unstructured references keep their preformatted text
+        if "title" not in reference and reference.get("citation"):
+            text = str(reference["citation"])
+            return [(text, False)], (text.lower(), "", "")
+
+        fields = _normalize(reference)
+        names = fields["authors"]
+        values = {"authors": write_authors(names, max_authors)} if names else {}
+        segments: Segments = []
+        separator = ""
+        for field, prefix, suffix, italic, next_separator in parts_by_type[_reference_type(fields)]:
+            value = values.get(field) if field == "authors" else fields.get(field)
+            if not value:
+                continue
+            if separator or prefix:
+                segments.append((separator + prefix, False))
+            segments.append((str(value), italic))
+            if suffix:
+                segments.append((suffix, False))
+            separator = next_separator
+        if end and segments:
+            # A trailing comma (as in IEEE's “Title,”) becomes the end mark: “Title.”
+            text, italic = segments[-1]
+            body = text.rstrip("\u201d")
+            if body.endswith(","):
+                segments[-1] = (body[:-1] + end + text[len(body):], italic)
+            elif not text.endswith(end):
+                segments.append((end, False))
+
+        # Merge neighbouring runs with the same formatting
+        merged: Segments = []
+        for text, italic in segments:
+            if merged and merged[-1][1] == italic:
+                merged[-1] = (merged[-1][0] + text, italic)
+            else:
+                merged.append((text, italic))
+        family = names[0][1].lower() if names else ""
+        return merged, (family, fields.get("year", ""), str(fields.get("title", "")).lower())
+
+    return format_reference
+
+
+def get_formatter(style: str) -> Callable[[Dict[str, Any]], Tuple[Segments, tuple]]:
+    """Return the compiled formatter of a style, compiling it on first use"""
+    formatter = _formatters.get(style)
+    if formatter is None:
+        formatter = _formatters[style] = compile_style(CITATION_STYLES[style])
+    return formatter
+
+
+def reference_hash(reference: Dict[str, Any]) -> str:
+    raw = json.dumps(reference, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def format_references(references: List[Dict[str, Any]], format_style: Optional[str] = None) -> List[FormattedReference]:
+    """
+    Format a whole reference list for a template in one pass
+
+    Each reference is formatted once per style and cached by its hash;
+    the list is then sorted (for author-year styles) and numbered.
+    References that format to no text are left out.
+
+    Args:
+        references: The report's references; structured fields (authors,
+            title, journal, year, ...) or a preformatted ``citation``
+        format_style: The report template ('ieee' or 'springer')
+
+    Returns:
+        The formatted references in bibliography order
+    """
+    style = citation_style(format_style)
+    rules = CITATION_STYLES[style]
+    formatter = get_formatter(style)
+    entries = []
+    for reference in references:
+        key = (style, reference_hash(reference))
+        entry = _cache.get(key)
+        if entry is None:
+            entry = formatter(reference)
+            _cache.set(key, entry)
+        if "".join(text for text, _ in entry[0]).strip():
+            entries.append(entry)
+
+    if rules["sort"] == "author_year":
+        entries = sorted(entries, key=lambda entry: entry[1])
+    if rules["numbered"]:
+        return [FormattedReference(f"[{number}]", segments) for number, (segments, _) in enumerate(entries, 1)]
+    return [FormattedReference("", segments) for segments, _ in entries]
@@ -1,36 +1,73 @@
+import re
+from xml.sax.saxutils import escape
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
-def create_document(project_data: dict) -> Document:
-    """Create a new Word document with project data"""
-    doc = Document()
-    
+from utils.citations import citation_style, format_references
+from utils.formatter import new_document
+
+SECTIONS = ['abstract', 'introduction', 'methodology', 'results', 'conclusion']
+
+# Characters that cannot appear in WordprocessingML text
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _run_xml(text: str, italic: bool = False) -> str:
+    text = escape(_INVALID_XML_CHARS.sub('', ' '.join(text.split('\t'))).replace('\n', ' '))
+    props = '<w:rPr><w:i/></w:rPr>' if italic else ''
+    return f'<w:r>{props}<w:t xml:space="preserve">{text}</w:t></w:r>'
+
+def _add_references(doc: Document, references: list, format_style: str) -> None:
+    doc.add_heading('References', level=2)
+    # Adding hundreds of paragraphs and runs through python-docx is slow,
+    # so the entries are written as XML and parsed in one go
+    bullet = f'<w:pPr><w:pStyle w:val="{doc.styles["List Bullet"].style_id}"/></w:pPr>'
+    entries = []
+    for ref in format_references(references, citation_style(format_style)):
+        # Numbered styles carry their own labels; the others are bulleted
+        runs = ''.join(_run_xml(text, italic) for text, italic in ref.segments)
+        if ref.label:
+            entries.append(f'<w:p>{_run_xml(ref.label + " ")}{runs}</w:p>')
+        else:
+            entries.append(f'<w:p>{bullet}{runs}</w:p>')
+    body = doc.element.body
+    sect_pr = body.sectPr
+    for element in parse_xml(f'<w:body {nsdecls("w")}>{"".join(entries)}</w:body>'):
+        if sect_pr is not None:
+            sect_pr.addprevious(element)
+        else:
+            body.append(element)
+
+def create_document(project_data: dict, format_style: str = None) -> Document:
+    """Create a new Word document with project data, laid out in the given (or the report's) template"""
+    format_style = format_style or project_data.get('template')
+    doc = new_document(format_style)
+
     # Add title
     title = doc.add_heading(project_data['title'], level=1)
     title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
+
     # Add authors
     authors = doc.add_paragraph()
     authors.add_run("By: " + ", ".join(project_data['authors']))
     authors.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
+
     # Add date
     from datetime import datetime
     date = doc.add_paragraph(datetime.now().strftime("%B %d, %Y"))
     date.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
+
     # Add sections
-    sections = ['abstract', 'introduction', 'methodology', 'results', 'conclusion']
-    for section in sections:
+    for section in SECTIONS:
         if project_data.get(section):
             doc.add_heading(section.capitalize(), level=2)
             doc.add_paragraph(project_data[section])
-    
+
     # Add references if available
     if project_data.get('references'):
-        doc.add_heading('References', level=2)
-        for ref in project_data['references']:
-            doc.add_paragraph(ref['citation'], style='List Bullet')
-    
+        _add_references(doc, project_data['references'], format_style)
+
     return doc
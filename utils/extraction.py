@@ -0,0 +1,273 @@
+import os
+import re
+import zipfile
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Largest upload accepted, and the most text kept from it (reports must fit in a MongoDB document)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+MAX_EXTRACTED_CHARS = int(os.getenv("MAX_EXTRACTED_CHARS", str(12 * 1024 * 1024)))
+
+# Heading texts (after numbering is stripped) mapped onto report fields
+SECTION_HEADINGS = {
+    "abstract": ["abstract", "summary", "executive summary"],
+    "introduction": ["introduction", "background", "overview", "motivation"],
+    "methodology": ["methodology", "methods", "method", "materials and methods", "approach",
+                    "proposed method", "proposed approach", "system design", "implementation",
+                    "experimental setup"],
+    "results": ["results", "results and discussion", "discussion", "evaluation", "experiments",
+                "experimental results", "findings"],
+    "conclusion": ["conclusion", "conclusions", "conclusion and future work", "conclusions and future work",
+                   "future work", "summary and conclusions"],
+    "references": ["references", "bibliography", "works cited", "literature cited"],
+}
+_HEADING_SECTIONS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Section numbers: '2', '4.1', 'II' or 'B.' (a bare letter needs the dot, or 'A summary' would lose its 'A')
+_NUMBERING = re.compile(r"^\s*(?:(?:\d+(?:\.\d+)*|[IVXLC]+)[.)]?\s+|[A-Z][.)]\s+)")
+_HYPHENATED = re.compile(r"(\w)-$")
+
+DOCX_MAGIC = b"PK\x03\x04"
+PDF_MAGIC = b"%PDF-"
+
+# A block is ("heading", text) or ("paragraph", text)
+Block = Tuple[str, str]
+
+
+class ExtractionError(ValueError):
+    """Raised when an uploaded file cannot be read as a DOCX or PDF"""
+
+
+class UploadTooLarge(ExtractionError):
+    """Raised when an upload is larger than UPLOAD_MAX_BYTES"""
+
+
+async def save_upload(chunks: AsyncIterator[bytes], f: IO[bytes], max_bytes: int = UPLOAD_MAX_BYTES) -> bytes:
+    """
+    Write a request body to an open file chunk by chunk
+
+    Returns:
+        The first bytes of the upload, for detect_format
+
+    Raises:
+        UploadTooLarge: As soon as more than ``max_bytes`` have arrived
+    """
+    head = b""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"Upload is larger than {max_bytes} bytes")
+        if len(head) < 8:
+            head += chunk[:8]
+        f.write(chunk)
+    f.flush()
+    return head
+
+
+def detect_format(head: bytes) -> Optional[str]:
+    """Return 'docx' or 'pdf' from the first bytes of a file, or None"""
+    if head.startswith(DOCX_MAGIC):
+        return "docx"
+    if head.lstrip().startswith(PDF_MAGIC):
+        return "pdf"
+    return None
+
+
+def heading_section(text: str) -> Optional[str]:
+    """Map a heading such as 'II. RELATED WORK' or '4 Results:' to a report field, if it names one"""
+    normalized = _NUMBERING.sub("", text).strip().rstrip(":.").lower()
+    return _HEADING_SECTIONS.get(" ".join(normalized.split()))
+
+
+def _docx_heading_styles(archive: zipfile.ZipFile) -> set:
+    """IDs of the paragraph styles that are headings (or the title) in a DOCX's styles.xml"""
+    from docx.oxml.ns import qn
+    from lxml import etree
+
+    try:
+        data = archive.read("word/styles.xml")
+    except KeyError:
+        return set()
+    headings = set()
+    for style in etree.fromstring(data).iter(qn("w:style")):
+        name = style.find(qn("w:name"))
+        name = (name.get(qn("w:val")) if name is not None else "").lower()
+        if name.startswith("heading") or name == "title" or style.find(f"{qn('w:pPr')}/{qn('w:outlineLvl')}") is not None:
+            headings.add(style.get(qn("w:styleId")))
+    return headings
+
+
+def iter_docx_blocks(path: str) -> Iterator[Block]:
+    """
+    Yield the paragraphs of a DOCX in document order
+
+    ``word/document.xml`` is parsed with iterparse and each paragraph is
+    freed once read, so memory stays bounded by the largest paragraph
+    rather than the size of the document. Paragraphs with a heading style
+    or an outline level are yielded as headings.
+    """
+    from docx.oxml.ns import qn
+    from lxml import etree
+
+    paragraph_tag, text_tag, tab_tag, break_tag = qn("w:p"), qn("w:t"), qn("w:tab"), qn("w:br")
+    style_path = f"{qn('w:pPr')}/{qn('w:pStyle')}"
+    outline_path = f"{qn('w:pPr')}/{qn('w:outlineLvl')}"
+    try:
+        archive = zipfile.ZipFile(path)
+        heading_styles = _docx_heading_styles(archive)
+        source = archive.open("word/document.xml")
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ExtractionError(f"Not a valid DOCX file: {e}")
+
+    with archive, source:
+        try:
+            for _, element in etree.iterparse(source, events=("end",), tag=paragraph_tag, huge_tree=True):
+                parts = []
+                for node in element.iter(text_tag, tab_tag, break_tag):
+                    if node.tag == text_tag:
+                        parts.append(node.text or "")
+                    else:
+                        parts.append("\t" if node.tag == tab_tag else "\n")
+                text = "".join(parts).strip()
+                style = element.find(style_path)
+                is_heading = (style is not None and style.get(qn("w:val")) in heading_styles) \
+                    or element.find(outline_path) is not None \
+                    or (len(text) < 80 and heading_section(text) is not None)
+
+                # Drop the paragraph (and anything before it) from the tree
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+                if text:
+                    yield ("heading" if is_heading else "paragraph"), text
+        except etree.XMLSyntaxError as e:
+            raise ExtractionError(f"Not a valid DOCX file: {e}")
+
+
+def iter_pdf_blocks(path: str) -> Iterator[Block]:
+    """
+    Yield the paragraphs of a PDF page by page
+
+    PDFs carry no paragraph structure, so lines are joined until a blank
+    line or a sentence ending well short of the full line width, and short
+    lines naming a known section are treated as headings. Hyphenated line
+    breaks are joined back into one word. Pages are read one at a time.
+    """
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+
+    try:
+        reader = PdfReader(path)
+        pages = reader.pages
+    except (PdfReadError, ValueError) as e:
+        raise ExtractionError(f"Not a valid PDF file: {e}")
+
+    parts: List[str] = []
+    width = 0
+
+    def paragraph() -> Optional[Block]:
+        text = "".join(parts).strip()
+        parts.clear()
+        return ("paragraph", text) if text else None
+
+    for page in pages:
+        try:
+            text = page.extract_text() or ""
+        except (PdfReadError, ValueError) as e:
+            raise ExtractionError(f"Could not read PDF text: {e}")
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line or (len(line) < 80 and heading_section(line)):
+                block = paragraph()
+                if block:
+                    yield block
+                if line:
+                    yield "heading", line
+                continue
+            width = max(width, len(line))
+            if _HYPHENATED.search(line):
+                parts.append(line[:-1])
+            else:
+                parts.append(line + " ")
+            if line[-1] in ".!?:" and len(line) < 0.8 * width:
+                block = paragraph()
+                if block:
+                    yield block
+    block = paragraph()
+    if block:
+        yield block
+
+
+def build_report(blocks: Iterator[Block], max_chars: int = MAX_EXTRACTED_CHARS) -> Dict[str, Any]:
+    """
+    Assemble extracted blocks into report fields
+
+    The title is the first heading (or paragraph) before any section.
+    Paragraphs go to the section of the last recognized heading; content
+    under unrecognized headings (e.g. 'Related Work') stays in the current
+    section with its heading kept as a line, and text before the first
+    section goes to the introduction. Paragraphs under 'References'
+    become one reference each.
+
+    Args:
+        blocks: Blocks from iter_docx_blocks or iter_pdf_blocks
+        max_chars: Most characters of text to keep
+
+    Returns:
+        A dict with title, the section fields, references and the
+        recognized ``headings``
+
+    Raises:
+        ExtractionError: If the file has no text or too much of it
+    """
+    sections: Dict[str, List[str]] = {}
+    references: List[Dict[str, Any]] = []
+    title = None
+    current = None
+    found: List[str] = []
+    total = 0
+    for kind, text in blocks:
+        total += len(text)
+        if total > max_chars:
+            raise ExtractionError(f"Document has more than {max_chars} characters of text")
+        if kind == "heading":
+            section = heading_section(text)
+            if section is not None:
+                current = section
+                found.append(section)
+                continue
+            if title is None and current is None:
+                title = text
+                continue
+        elif title is None and current is None:
+            title = text
+            continue
+
+        if current == "references":
+            if kind == "paragraph":
+                references.append({"citation": text})
+            continue
+        sections.setdefault(current or "introduction", []).append(text)
+
+    if title is None and not sections and not references:
+        raise ExtractionError("No text found in the document")
+    report: Dict[str, Any] = {
+        "title": title or "Untitled report",
+        "references": references,
+        "headings": list(dict.fromkeys(found)),
+    }
+    for section, paragraphs in sections.items():
+        report[section] = "\n\n".join(paragraphs)
+    return report
+
+
+def extract_report(path: str, file_format: str) -> Dict[str, Any]:
+    """Extract report fields from a DOCX or PDF on disk (blocking; run it in a thread)"""
+    blocks = iter_docx_blocks(path) if file_format == "docx" else iter_pdf_blocks(path)
+    return build_report(blocks)
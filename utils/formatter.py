@@ -1,69 +1,124 @@
+from copy import deepcopy
 from typing import Dict, Any
 from docx import Document
+from docx.shared import Pt
+from dotenv import load_dotenv
+import json
 import os
 
+# Load environment variables
+load_dotenv()
+
+# Optional JSON file of extra templates: {"name": {<layout keys>}, ...}
+REPORT_TEMPLATES_FILE = os.getenv("REPORT_TEMPLATES_FILE")
+
+# Page and typography settings for each supported style. Lengths are in EMU
+# (914400 per inch); pdf_font/pdf_bold_font are the matching PDF base fonts.
+# An optional "docx_template" path starts the DOCX from a designed .docx file
+# instead of python-docx's default one. Add styles with register_template()
+# or through REPORT_TEMPLATES_FILE.
+TEMPLATE_LAYOUTS: Dict[str, Dict[str, Any]] = {
+    "ieee": {
+        "margin": 914400,            # 1 inch
+        "header_distance": 457200,   # 0.5 inch
+        "font_name": "Times New Roman",
+        "font_size": 12,             # Points
+        "line_spacing": 2.0,         # Double spacing
+        "pdf_font": "Times-Roman",
+        "pdf_bold_font": "Times-Bold",
+    },
+    "springer": {
+        "margin": 1000000,           # ~1.1 inches
+        "header_distance": 500000,
+        "font_name": "Arial",
+        "font_size": 10,
+        "line_spacing": 1.5,
+        "pdf_font": "Helvetica",
+        "pdf_bold_font": "Helvetica-Bold",
+    },
+}
+
+REQUIRED_LAYOUT_KEYS = set(TEMPLATE_LAYOUTS['ieee'])
+
+# Paragraph styles used by create_document; the layout is set on these
+# styles once instead of on every paragraph
+FORMATTED_STYLES = ['Normal', 'Heading 1', 'Heading 2', 'List Bullet']
+
+# Styled base document per template, parsed once per process
+_base_documents: Dict[str, Document] = {}
+
+def _template_name(format_style: str) -> str:
+    name = (format_style or 'ieee').lower()
+    return name if name in TEMPLATE_LAYOUTS else 'ieee'
+
+def get_layout(format_style: str = 'ieee') -> Dict[str, Any]:
+    """Return the layout for a style, defaulting to IEEE for unknown styles"""
+    return TEMPLATE_LAYOUTS[_template_name(format_style)]
+
+def register_template(name: str, layout: Dict[str, Any]) -> None:
+    """
+    Add or replace a template
+
+    Args:
+        name: The style name used in reports' ``template`` field
+        layout: Settings with the same keys as the built-in layouts
+    """
+    missing = REQUIRED_LAYOUT_KEYS - set(layout)
+    if missing:
+        raise ValueError(f"Template '{name}' is missing: {', '.join(sorted(missing))}")
+    TEMPLATE_LAYOUTS[name.lower()] = dict(layout)
+    _base_documents.pop(name.lower(), None)
+
+def new_document(format_style: str = 'ieee') -> Document:
+    """Return an empty document that already carries the style's layout"""
+    name = _template_name(format_style)
+    base = _base_documents.get(name)
+    if base is None:
+        layout = TEMPLATE_LAYOUTS[name]
+        base = DocumentFormatter._apply_layout(Document(layout.get('docx_template')), layout)
+        _base_documents[name] = base
+    return deepcopy(base)
+
 class DocumentFormatter:
     """Handles formatting documents according to different style guides"""
     
     @staticmethod
-    def format_ieee(doc: Document) -> Document:
-        """Format document according to IEEE guidelines"""
-        # Set margins to 1 inch (72 points = 1 inch)
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = 914400  # 1 inch in twips (1/1440 of an inch)
-            section.bottom_margin = 914400
-            section.left_margin = 914400
-            section.right_margin = 914400
-            
+    def _apply_layout(doc: Document, layout: Dict[str, Any]) -> Document:
+        """Apply a layout from TEMPLATE_LAYOUTS to a document"""
+        for section in doc.sections:
+            section.top_margin = layout['margin']
+            section.bottom_margin = layout['margin']
+            section.left_margin = layout['margin']
+            section.right_margin = layout['margin']
+
             # Set header/footer distance
-            section.header_distance = 457200  # 0.5 inch
-            section.footer_distance = 457200
-        
+            section.header_distance = layout['header_distance']
+            section.footer_distance = layout['header_distance']
+
         # Set font for the entire document
         style = doc.styles['Normal']
         font = style.font
-        font.name = 'Times New Roman'
-        font.size = 12
-        
-        # Set paragraph formatting
-        for paragraph in doc.paragraphs:
-            paragraph_format = paragraph.paragraph_format
-            paragraph_format.line_spacing = 2.0  # Double spacing
+        font.name = layout['font_name']
+        font.size = Pt(layout['font_size'])
+
+        # Set paragraph formatting on the styles, not on each paragraph
+        for style_name in FORMATTED_STYLES:
+            paragraph_format = doc.styles[style_name].paragraph_format
+            paragraph_format.line_spacing = layout['line_spacing']
             paragraph_format.space_after = 0
             paragraph_format.space_before = 0
-        
+
         return doc
-    
+
+    @staticmethod
+    def format_ieee(doc: Document) -> Document:
+        """Format document according to IEEE guidelines"""
+        return DocumentFormatter._apply_layout(doc, TEMPLATE_LAYOUTS['ieee'])
+
     @staticmethod
     def format_springer(doc: Document) -> Document:
         """Format document according to Springer guidelines"""
-        # Set margins
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = 1000000    # ~1.4 inches
-            section.bottom_margin = 1000000
-            section.left_margin = 1000000
-            section.right_margin = 1000000
-            
-            # Set header/footer distance
-            section.header_distance = 500000
-            section.footer_distance = 500000
-        
-        # Set font for the entire document
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Arial'
-        font.size = 10
-        
-        # Set paragraph formatting
-        for paragraph in doc.paragraphs:
-            paragraph_format = paragraph.paragraph_format
-            paragraph_format.line_spacing = 1.5
-            paragraph_format.space_after = 0
-            paragraph_format.space_before = 0
-        
-        return doc
+        return DocumentFormatter._apply_layout(doc, TEMPLATE_LAYOUTS['springer'])
 
 def apply_formatting(doc: Document, format_style: str = 'ieee') -> Document:
     """
@@ -76,12 +131,14 @@ def apply_formatting(doc: Document, format_style: str = 'ieee') -> Document:
     Returns:
         The formatted document
     """
-    formatter = DocumentFormatter()
-    
-    if format_style.lower() == 'ieee':
-        return formatter.format_ieee(doc)
-    elif format_style.lower() == 'springer':
-        return formatter.format_springer(doc)
-    else:
-        # Default to IEEE if unknown format
-        return formatter.format_ieee(doc)
+    return DocumentFormatter._apply_layout(doc, get_layout(format_style))
+
+def load_templates(path: str) -> None:
+    """Register every template defined in a JSON file"""
+    with open(path, encoding='utf-8') as f:
+        for name, layout in json.load(f).items():
+            register_template(name, layout)
+
+if REPORT_TEMPLATES_FILE:
+    # Loaded at import so every render worker process sees the same templates
+    load_templates(REPORT_TEMPLATES_FILE)
@@ -0,0 +1,221 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from utils.metrics import RENDER_LATENCY
+
+# Load environment variables
+load_dotenv()
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+OUTPUT_FOLDER = os.getenv("OUTPUT_FOLDER") or os.path.join(tempfile.gettempdir(), "reports")
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+SUPPORTED_FORMATS = ("docx", "pdf")
+
+
+def render_report_files(project_data: dict, format_style: str, output_dir: str,
+                        basename: str, formats: List[str]) -> Dict[str, Any]:
+    """
+    Render a report to DOCX and/or PDF files (runs inside a worker process)
+
+    Args:
+        project_data: The report dict accepted by create_document
+        format_style: The style to apply ('ieee' or 'springer')
+        output_dir: Directory to write the files to
+        basename: File name without extension
+        formats: Formats to produce ('docx', 'pdf')
+
+    Returns:
+        ``files`` (format to generated file name) and ``timings`` (seconds
+        per rendering stage, reported to the API process's metrics)
+    """
+    # Imported here so the API process does not pay for them at startup
+    from utils.docx_generator import create_document
+    from utils.pdf_renderer import create_pdf
+
+    os.makedirs(output_dir, exist_ok=True)
+    files = {}
+    timings = {}
+    for fmt in formats:
+        filename = f"{basename}.{fmt}"
+        path = os.path.join(output_dir, filename)
+        # Write to a temporary name first so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if fmt == "docx":
+            started = time.perf_counter()
+            doc = create_document(project_data, format_style)
+            timings["create_document"] = time.perf_counter() - started
+            started = time.perf_counter()
+            doc.save(tmp_path)
+            timings["save_docx"] = time.perf_counter() - started
+        else:
+            started = time.perf_counter()
+            with open(tmp_path, "wb") as f:
+                f.write(create_pdf(project_data, format_style))
+            timings["render_pdf"] = time.perf_counter() - started
+        os.replace(tmp_path, path)
+        files[fmt] = filename
+    return {"files": files, "timings": timings}
+
+
+def record_render_timings(future: Future, format_style: str) -> None:
+    """Feed a finished render's stage timings into the metrics registry"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    for stage, seconds in future.result()["timings"].items():
+        RENDER_LATENCY.observe(seconds, template=format_style, stage=stage)
+
+
+class RenderJobManager:
+    """Tracks report rendering jobs executed in a bounded process pool"""
+
+    def __init__(self, max_workers: int = RENDER_WORKERS, output_dir: str = OUTPUT_FOLDER):
+        self.max_workers = max_workers
+        self.output_dir = output_dir
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Unfinished jobs by output basename, so identical renders are shared
+        self._pending: Dict[str, str] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn keeps worker processes free of the parent's event loop and sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_TTL_SECONDS
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if self._done(job) and job["created_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _completion(job: Dict[str, Any]):
+        """The future that resolves when the job, including its finalize step, is over"""
+        return job.get("task") or job["future"]
+
+    def _done(self, job: Dict[str, Any]) -> bool:
+        return self._completion(job).done()
+
+    def submit(self, project_data: dict, format_style: str, formats: List[str],
+               basename: Optional[str] = None, cached_formats: List[str] = (),
+               finalize: Optional[Callable[[List[str]], Awaitable[None]]] = None) -> str:
+        """
+        Queue a report for rendering and return the job ID
+
+        Args:
+            project_data: The report dict accepted by create_document
+            format_style: The style to apply ('ieee' or 'springer')
+            formats: Formats the caller wants
+            basename: Output file name without extension (defaults to one per job)
+            cached_formats: Formats already present under ``basename``; these
+                are not rendered again
+            finalize: Coroutine function called on the event loop with the
+                rendered formats once rendering succeeds; the job is only
+                reported as done after it returns
+        """
+        self._prune()
+        pending_id = self._pending.get(basename) if basename else None
+        if pending_id is not None:
+            pending = self._jobs.get(pending_id)
+            if pending is not None and not self._done(pending) and set(formats) <= set(pending["formats"]):
+                return pending_id
+
+        job_id = uuid.uuid4().hex
+        basename = basename or f"report_{job_id}"
+        to_render = [fmt for fmt in formats if fmt not in cached_formats]
+        if to_render:
+            args = (render_report_files, project_data, format_style, self.output_dir,
+                    basename, to_render)
+            try:
+                future = self.executor.submit(*args)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool
+                self._executor = None
+                future = self.executor.submit(*args)
+            self._pending[basename] = job_id
+
+            def clear_pending(_):
+                if self._pending.get(basename) == job_id:
+                    del self._pending[basename]
+
+            future.add_done_callback(clear_pending)
+            future.add_done_callback(lambda done: record_render_timings(done, format_style))
+        else:
+            future = Future()
+            future.set_result({})
+
+        job = {
+            "future": future,
+            "created_at": time.time(),
+            "formats": formats,
+            "files": {fmt: f"{basename}.{fmt}" for fmt in formats},
+        }
+        if finalize is not None and to_render:
+            job["task"] = asyncio.ensure_future(self._finalize(future, finalize, to_render))
+        self._jobs[job_id] = job
+        return job_id
+
+    @staticmethod
+    async def _finalize(future: Future, finalize, rendered: List[str]) -> None:
+        await asyncio.wrap_future(future)
+        await finalize(rendered)
+
+    async def wait(self, job_id: str) -> Dict[str, str]:
+        """Wait for a job to finish and return its files"""
+        job = self._jobs[job_id]
+        completion = self._completion(job)
+        if isinstance(completion, Future):
+            completion = asyncio.wrap_future(completion)
+        await completion
+        return job["files"]
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the public status of a job, or None if it is unknown"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future: Future = job["future"]
+        completion = self._completion(job)
+        result = {"job_id": job_id, "formats": job["formats"]}
+        if not future.done():
+            result["status"] = "running" if future.running() else "queued"
+        elif not completion.done():
+            result["status"] = "running"
+        elif completion.exception() is not None:
+            result["status"] = "failed"
+            result["error"] = str(completion.exception())
+        else:
+            result["status"] = "done"
+            result["files"] = job["files"]
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_manager: Optional[RenderJobManager] = None
+
+
+def get_job_manager() -> RenderJobManager:
+    """Return the process-wide render job manager"""
+    global _manager
+    if _manager is None:
+        _manager = RenderJobManager()
+    return _manager
@@ -0,0 +1,290 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add a Server-Timing header with the stages of each request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Seconds; covers fast Mongo lookups up to slow model calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        names = self.label_names + ("le",)
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(float(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {int(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(float(state[-2]))}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {int(state[-1])}")
+        return lines
+
+
+class CallbackMetric:
+    """Metric read at scrape time from existing stats (e.g. cache counters)"""
+
+    def __init__(self, name: str, documentation: str, type: str, labels: Iterable[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.label_names = tuple(labels)
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in self.callback()
+        ]
+
+
+class Registry:
+    """Process-wide set of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self._metrics.get(name) or self.register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self.register(Histogram(name, documentation, labels, buckets))
+
+    def callback(self, name: str, documentation: str, type: str, labels: Iterable[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, type, labels, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.collect()
+            except Exception as e:
+                print(f"Failed to collect metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"])
+STAGE_LATENCY = registry.histogram(
+    "stage_duration_seconds", "Time spent in instrumented stages (spans)", ["stage"])
+AI_LATENCY = registry.histogram(
+    "ai_request_duration_seconds", "Gemini call latency", ["kind", "outcome"])
+AI_REJECTED = registry.counter(
+    "ai_requests_rejected_total", "Gemini calls refused with a 429 before or after reaching the model", ["reason"])
+AI_TOKENS = registry.counter(
+    "ai_tokens_total", "Gemini tokens reported by the API", ["type"])
+RENDER_LATENCY = registry.histogram(
+    "render_duration_seconds", "Rendering time per template and stage", ["template", "stage"])
+MONGO_LATENCY = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "outcome"])
+
+# Spans recorded during the current request, for the Server-Timing header
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = \
+    contextvars.ContextVar("request_spans", default=None)
+
+
+def _add_request_span(stage: str, seconds: float) -> None:
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def record_span(stage: str, seconds: float) -> None:
+    """Record a finished stage in the histogram and the current request's timings"""
+    STAGE_LATENCY.observe(seconds, stage=stage)
+    _add_request_span(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block of code as a named stage (usable in sync and async code)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - started)
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """Format spans as a Server-Timing header value (durations in milliseconds)"""
+    totals: Dict[str, float] = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0) + seconds
+    entries = [f"{stage.replace(' ', '_')};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every request per route and adding Server-Timing"""
+
+    def __init__(self, app, server_timing_enabled: bool = SERVER_TIMING):
+        self.app = app
+        self.server_timing_enabled = server_timing_enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing_enabled:
+                    value = server_timing(spans, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", value.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_spans.reset(token)
+            route = scope.get("route")
+            # Label by route template to keep the number of series bounded
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(time.perf_counter() - started,
+                                    method=scope["method"], route=path, status=str(status))
+
+
+class MongoCommandListener:
+    """
+    pymongo command listener feeding MONGO_LATENCY
+
+    Motor runs commands in threads with a copy of the caller's context, so
+    the time also shows up as ``mongo`` in that request's Server-Timing.
+    """
+
+    def started(self, event) -> None:
+        pass
+
+    def _record(self, event, outcome: str) -> None:
+        seconds = event.duration_micros / 1e6
+        MONGO_LATENCY.observe(seconds, command=event.command_name, outcome=outcome)
+        _add_request_span("mongo", seconds)
+
+    def succeeded(self, event) -> None:
+        self._record(event, "ok")
+
+    def failed(self, event) -> None:
+        self._record(event, "error")
+
+
+def mongo_listener():
+    """Return a CommandListener instance (pymongo is imported lazily)"""
+    from pymongo import monitoring
+
+    class _Listener(MongoCommandListener, monitoring.CommandListener):
+        pass
+
+    return _Listener()
+
+
+def record_usage(response) -> None:
+    """Count the tokens reported in a Gemini response's usage metadata"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for field, token_type in (("prompt_token_count", "prompt"), ("candidates_token_count", "completion")):
+        count = getattr(usage, field, None)
+        if count:
+            AI_TOKENS.inc(count, type=token_type)
@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from bson import ObjectId
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$oid" in value:
+            return ObjectId(value["$oid"])
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode the sort-key values of the last item into an opaque token"""
+    raw = json.dumps({key: _encode_value(value) for key, value in values.items()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Decode a token produced by encode_cursor
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {key: _decode_value(value) for key, value in raw.items()}
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_filter(sort: List[Tuple[str, int]], cursor: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the filter selecting documents after ``cursor`` in ``sort`` order
+
+    For sort keys (a, b) this yields ``a < x OR (a == x AND b < y)``
+    (with ``>`` for ascending keys), which MongoDB can answer from an index
+    on the same keys no matter how deep the page is.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev: cursor[prev] for prev, _ in sort[:i]}
+        clause[field] = {"$lt" if direction < 0 else "$gt": cursor[field]}
+        clauses.append(clause)
+    return {"$or": clauses}
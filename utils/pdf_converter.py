@@ -1,4 +1,3 @@
-from docx2pdf import convert
 import os
 
 import tempfile
@@ -7,6 +6,9 @@ def convert_docx_to_pdf(docx_path: str, output_path: str = None) -> str:
     """
     Convert a DOCX file to PDF
     
+    This needs Microsoft Word (docx2pdf), so it only works on Windows/macOS
+    hosts. Use utils.pdf_renderer.create_pdf to render reports on Linux.
+    
     Args:
         docx_path: Path to the input DOCX file
         output_path: Path to save the output PDF (optional). If not provided,
@@ -21,6 +23,7 @@ def convert_docx_to_pdf(docx_path: str, output_path: str = None) -> str:
             output_path = temp_file.name
     
     try:
+        from docx2pdf import convert
         convert(docx_path, output_path)
         return output_path
     except Exception as e:
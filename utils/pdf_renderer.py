@@ -0,0 +1,108 @@
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import ListFlowable, ListItem, Paragraph, SimpleDocTemplate
+
+from utils.citations import citation_style, format_references
+from utils.formatter import get_layout
+
+EMU_PER_POINT = 12700
+SECTIONS = ['abstract', 'introduction', 'methodology', 'results', 'conclusion']
+
+
+def _build_styles(layout: Dict[str, Any]) -> Dict[str, ParagraphStyle]:
+    """Build paragraph styles matching a layout from utils.formatter"""
+    size = layout['font_size']
+    leading = size * 1.2 * layout['line_spacing']
+    body = ParagraphStyle(
+        'Body',
+        fontName=layout['pdf_font'],
+        fontSize=size,
+        leading=leading,
+        alignment=TA_JUSTIFY,
+    )
+    return {
+        'body': body,
+        'title': ParagraphStyle(
+            'Title', parent=body, fontName=layout['pdf_bold_font'],
+            fontSize=size + 6, leading=(size + 6) * 1.2, alignment=TA_CENTER, spaceAfter=size,
+        ),
+        'centered': ParagraphStyle('Centered', parent=body, alignment=TA_CENTER),
+        'heading': ParagraphStyle(
+            'Heading', parent=body, fontName=layout['pdf_bold_font'],
+            fontSize=size + 2, leading=(size + 2) * 1.2, spaceBefore=size, spaceAfter=size / 2,
+        ),
+    }
+
+
+def _text_paragraphs(text: str, style: ParagraphStyle) -> List[Paragraph]:
+    """Turn a block of plain text into one Paragraph per line"""
+    return [Paragraph(escape(line), style) for line in text.splitlines() if line.strip()]
+
+
+def _reference_markup(ref) -> str:
+    """Paragraph markup for a formatted reference, with its label and italic runs"""
+    markup = "".join(f"<i>{escape(text)}</i>" if italic else escape(text) for text, italic in ref.segments)
+    return f"{ref.label} {markup}" if ref.label else markup
+
+
+def build_story(project_data: dict, format_style: str = 'ieee') -> list:
+    """Build the reportlab flowables for a report (same layout as create_document)"""
+    layout = get_layout(format_style)
+    styles = _build_styles(layout)
+    story = [
+        Paragraph(escape(project_data['title']), styles['title']),
+        Paragraph(escape("By: " + ", ".join(project_data['authors'])), styles['centered']),
+        Paragraph(datetime.now().strftime("%B %d, %Y"), styles['centered']),
+    ]
+
+    for section in SECTIONS:
+        if project_data.get(section):
+            story.append(Paragraph(section.capitalize(), styles['heading']))
+            story.extend(_text_paragraphs(project_data[section], styles['body']))
+
+    references = project_data.get('references')
+    if references:
+        story.append(Paragraph('References', styles['heading']))
+        formatted = format_references(references, citation_style(format_style))
+        items = [Paragraph(_reference_markup(ref), styles['body']) for ref in formatted]
+        # Numbered styles carry their own labels; the others are bulleted
+        if formatted and formatted[0].label:
+            story.extend(items)
+        else:
+            story.append(ListFlowable([ListItem(item) for item in items], bulletType='bullet'))
+
+    return story
+
+
+def create_pdf(project_data: dict, format_style: str = 'ieee') -> bytes:
+    """
+    Render a report straight to PDF without going through Word
+
+    Args:
+        project_data: The same report dict accepted by create_document
+        format_style: The style to apply ('ieee' or 'springer')
+
+    Returns:
+        The PDF file contents
+    """
+    layout = get_layout(format_style)
+    margin = layout['margin'] / EMU_PER_POINT
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=LETTER,
+        leftMargin=margin,
+        rightMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin,
+        title=project_data['title'],
+        author=", ".join(project_data['authors']),
+    )
+    doc.build(build_story(project_data, format_style))
+    return buffer.getvalue()
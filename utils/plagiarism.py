@@ -1,23 +1,249 @@
-import requests
-from typing import Dict, Optional
+import asyncio
+import hashlib
 import os
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
 from dotenv import load_dotenv
 
+from utils.ai_cache import AICache, AI_CACHE_MONGO, make_cache_key
+
 # Load environment variables
 load_dotenv()
 
 # You can integrate with a plagiarism checking API like Quillbot, Unicheck, etc.
-# This is a placeholder for the actual implementation
 PLAGIARISM_API_KEY = os.getenv("PLAGIARISM_API_KEY")
-PLAGIARISM_API_URL = "https://api.plagiarismchecker.com/v1/check"  # Example URL
+PLAGIARISM_API_URL = os.getenv("PLAGIARISM_API_URL", "https://api.plagiarismchecker.com/v1/check")
+PLAGIARISM_CHUNK_CHARS = int(os.getenv("PLAGIARISM_CHUNK_CHARS", "4000"))
+PLAGIARISM_MAX_CONCURRENCY = int(os.getenv("PLAGIARISM_MAX_CONCURRENCY", "4"))
+PLAGIARISM_MAX_RETRIES = int(os.getenv("PLAGIARISM_MAX_RETRIES", "3"))
+PLAGIARISM_TIMEOUT_SECONDS = float(os.getenv("PLAGIARISM_TIMEOUT_SECONDS", "30"))
+# Longest wait between retries; a chunk whose Retry-After asks for more fails instead
+PLAGIARISM_MAX_BACKOFF_SECONDS = float(os.getenv("PLAGIARISM_MAX_BACKOFF_SECONDS", "30"))
+# Scans are billed, so keep results for a month unless told otherwise
+PLAGIARISM_CACHE_TTL_SECONDS = float(os.getenv("PLAGIARISM_CACHE_TTL_SECONDS", str(30 * 86400)))
+
+# Bump when the request payload changes so old results are not reused
+SCAN_VERSION = "1"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_chunks(text: str, max_chars: int = PLAGIARISM_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into paragraph-aligned chunks of at most ``max_chars``
+
+    A chunk may only end on a paragraph whose own hash picks it as a
+    boundary (or when it is full), so editing one paragraph changes the
+    chunks around it and leaves the rest, and their cached results, alone.
+    """
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        # Oversized paragraph: fall back to sentences, then hard cuts
+        current = ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            while len(sentence) > max_chars:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current} {sentence}" if current else sentence
+        if current:
+            pieces.append(current)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+        boundary = hashlib.sha256(piece.encode("utf-8")).digest()[0] % 4 == 0
+        if boundary and len(current) >= max_chars // 4:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response], max_backoff: float) -> Optional[float]:
+    """Seconds to wait before the next attempt, or None if the server asks for longer than ``max_backoff``"""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+            return delay if delay <= max_backoff else None
+    return min(0.5 * (2 ** attempt) + random.uniform(0, 0.25), max_backoff)
+
+
+def merge_results(chunks: List[str], outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine per-chunk scan results into one report
+
+    The overall score is the length-weighted mean of the chunk scores and
+    sources are de-duplicated by URL.
+    """
+    scored_chars = 0
+    weighted_score = 0.0
+    sources: Dict[str, Dict[str, Any]] = {}
+    parts = []
+    offset = 0
+    for chunk, outcome in zip(chunks, outcomes):
+        part = {"offset": offset, "length": len(chunk), **outcome}
+        parts.append(part)
+        offset += len(chunk)
+        result = outcome.get("result")
+        if not isinstance(result, dict):
+            continue
+        score = result.get("score", result.get("percent"))
+        if isinstance(score, (int, float)):
+            weighted_score += score * len(chunk)
+            scored_chars += len(chunk)
+        for source in result.get("sources") or []:
+            key = (source.get("url") or repr(source)) if isinstance(source, dict) else repr(source)
+            sources.setdefault(key, source)
+
+    failed = sum(1 for outcome in outcomes if "error" in outcome)
+    if failed == len(outcomes):
+        status = "error"
+    elif failed:
+        status = "partial"
+    else:
+        status = "success"
+    return {
+        "status": status,
+        "score": round(weighted_score / scored_chars, 2) if scored_chars else None,
+        "sources": list(sources.values()),
+        "chunks": parts,
+    }
+
+
+class PlagiarismClient:
+    """Pooled async client for the external plagiarism API with per-chunk result caching"""
+
+    def __init__(self, api_url: str = PLAGIARISM_API_URL, api_key: Optional[str] = PLAGIARISM_API_KEY,
+                 max_concurrency: int = PLAGIARISM_MAX_CONCURRENCY, max_retries: int = PLAGIARISM_MAX_RETRIES,
+                 timeout: float = PLAGIARISM_TIMEOUT_SECONDS, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cache: Optional[AICache] = None, max_backoff: float = PLAGIARISM_MAX_BACKOFF_SECONDS):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.cache = cache or AICache(ttl=PLAGIARISM_CACHE_TTL_SECONDS)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            transport=transport,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            headers={"Authorization": f"Bearer {api_key}"},
+        )
+        self.requests = 0
+        self.retries = 0
+
+    async def _scan(self, chunk: str) -> Dict[str, Any]:
+        payload = {
+            "text": chunk,
+            "language": "en",
+            "scan_type": "web"  # or "web_and_publications"
+        }
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                # Only hold a slot while a request is in flight, not while backing off
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await self._http.post(self.api_url, json=payload)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise RuntimeError(f"Plagiarism API error: {response.status_code} - {response.text[:200]}")
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            delay = _retry_delay(attempt, response, self.max_backoff)
+            if delay is None:
+                raise RuntimeError(f"Plagiarism API asked to retry after {response.headers['retry-after']}s "
+                                   f"(limit {self.max_backoff:g}s)")
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _scan_chunk(self, chunk: str) -> Dict[str, Any]:
+        key = make_cache_key("plagiarism", SCAN_VERSION, self.api_url, chunk)
+        scanned = False
+
+        async def compute():
+            nonlocal scanned
+            scanned = True
+            return await self._scan(chunk)
+
+        try:
+            result = await self.cache.get_or_compute(key, compute)
+        except Exception as e:
+            return {"cached": False, "error": str(e)}
+        return {"cached": not scanned, "result": result}
+
+    async def check(self, text: str) -> Dict[str, Any]:
+        """Scan ``text`` chunk by chunk, concurrently, and merge the results"""
+        started = time.perf_counter()
+        chunks = split_chunks(text)
+        if not chunks:
+            return {"status": "error", "message": "No text to check"}
+        outcomes = await asyncio.gather(*[self._scan_chunk(chunk) for chunk in chunks])
+        merged = merge_results(chunks, list(outcomes))
+        merged["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return merged
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "retries": self.retries, "cache": self.cache.stats()}
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_client: Optional[PlagiarismClient] = None
+
+
+def get_plagiarism_client() -> PlagiarismClient:
+    """Return the process-wide plagiarism client (one connection pool per process)"""
+    global _client
+    if _client is None:
+        getter = None
+        if AI_CACHE_MONGO:
+            from database import get_ai_cache_collection
+            getter = get_ai_cache_collection
+        _client = PlagiarismClient(cache=AICache(ttl=PLAGIARISM_CACHE_TTL_SECONDS, collection_getter=getter))
+    return _client
+
+
+async def close_plagiarism_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def check_plagiarism(text: str) -> Dict[str, any]:
     """
     Check text for plagiarism using an external API
-    
+
     Args:
         text: The text to check for plagiarism
-        
+
     Returns:
         Dict containing plagiarism check results
     """
@@ -26,34 +252,9 @@ async def check_plagiarism(text: str) -> Dict[str, any]:
             "status": "error",
             "message": "Plagiarism API key not configured"
         }
-    
+
     try:
-        headers = {
-            "Authorization": f"Bearer {PLAGIARISM_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "text": text,
-            "language": "en",
-            "scan_type": "web"  # or "web_and_publications"
-        }
-        
-        response = requests.post(
-            PLAGIARISM_API_URL,
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {
-                "status": "error",
-                "message": f"Plagiarism API error: {response.status_code} - {response.text}"
-            }
-            
+        return await get_plagiarism_client().check(text)
     except Exception as e:
         return {
             "status": "error",
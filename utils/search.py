@@ -0,0 +1,87 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# Fields covered by the reports text index, with their relevance weights
+TEXT_INDEX_WEIGHTS = {
+    "title": 10,
+    "authors": 5,
+    "abstract": 3,
+    "introduction": 1,
+    "methodology": 1,
+    "results": 1,
+    "conclusion": 1,
+}
+SNIPPET_CHARS = 160
+MAX_SNIPPETS = 3
+
+_TOKEN = re.compile(r'-?"[^"]*"|-?\S+')
+_WORD = re.compile(r"\w+")
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Return the lower-cased words of a ``$text`` search string to highlight
+
+    Quoted phrases are split into their words and negated terms
+    (``-word``) are dropped, as they never appear in a match.
+    """
+    terms = []
+    for token in _TOKEN.findall(query):
+        if token.startswith("-"):
+            continue
+        terms.extend(word.lower() for word in _WORD.findall(token))
+    return list(dict.fromkeys(terms))
+
+
+def _term_pattern(terms: List[str]) -> Optional[re.Pattern]:
+    if not terms:
+        return None
+    # MongoDB matches stemmed words, so highlight any word sharing the stem-ish prefix
+    stems = sorted({term if len(term) < 5 else term[:len(term) - 2] for term in terms}, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(re.escape(stem) for stem in stems) + r")\w*", re.IGNORECASE)
+
+
+def _snippet(text: str, pattern: re.Pattern, width: int) -> Optional[Dict[str, Any]]:
+    first = pattern.search(text)
+    if first is None:
+        return None
+    start = max(0, first.start() - width // 4)
+    if start:
+        # Do not cut a word in half
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < first.start() else start
+    end = min(len(text), start + width)
+    snippet = text[start:end]
+    return {
+        "text": ("…" if start else "") + snippet + ("…" if end < len(text) else ""),
+        "highlights": [
+            [match.start() + (1 if start else 0), match.end() + (1 if start else 0)]
+            for match in pattern.finditer(snippet)
+        ],
+    }
+
+
+def build_snippets(report: Dict[str, Any], terms: List[str], width: int = SNIPPET_CHARS) -> List[Dict[str, Any]]:
+    """
+    Extract highlighted snippets from the indexed fields of a report
+
+    Returns:
+        Up to MAX_SNIPPETS dicts with the ``field``, the snippet ``text`` and
+        ``highlights`` as [start, end) offsets into that text
+    """
+    pattern = _term_pattern(terms)
+    if pattern is None:
+        return []
+    snippets = []
+    for field in TEXT_INDEX_WEIGHTS:
+        value = report.get(field)
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        if not value:
+            continue
+        snippet = _snippet(value, pattern, width)
+        if snippet is not None:
+            snippets.append({"field": field, **snippet})
+            if len(snippets) == MAX_SNIPPETS:
+                break
+    return snippets
@@ -0,0 +1,73 @@
+from typing import Any, Dict
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+from models import REPORT_SUMMARY_FIELDS, Report
+
+# Report fields in the order the Report model serializes them, with their default
+# factory and default (``_id`` goes last)
+_REPORT_FIELDS = {
+    name: (field.default_factory, None if field.is_required() else field.default)
+    for name, field in Report.model_fields.items() if name != "id"
+}
+_SUMMARY_FIELDS = {name: _REPORT_FIELDS[name] for name in REPORT_SUMMARY_FIELDS}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON with orjson, writing ObjectIds as strings"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, for content that needs no validation"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def report_document(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape a stored report like ``Report`` would serialize it, without validating it
+
+    Reports are validated on write, so reads only need the model's field
+    order and defaults: fields missing from the document (or left out by a
+    projection) get the model default and unknown fields are dropped.
+
+    Args:
+        report: A report document as returned by MongoDB
+
+    Returns:
+        A dict ready for ``dumps``
+    """
+    return _shape(report, _REPORT_FIELDS)
+
+
+def report_summary(report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape a report for ``view=summary``: only REPORT_SUMMARY_FIELDS and ``_id``
+
+    The summary projection leaves the sections and references out, so they
+    are omitted rather than filled with defaults that would misreport them.
+    """
+    return _shape(report, _SUMMARY_FIELDS)
+
+
+def _shape(report: Dict[str, Any], fields: Dict[str, tuple]) -> Dict[str, Any]:
+    shaped = {}
+    for name, (factory, default) in fields.items():
+        if name in report:
+            shaped[name] = report[name]
+        else:
+            shaped[name] = factory() if factory is not None else default
+    report_id = report.get("_id")
+    shaped["_id"] = str(report_id) if report_id is not None else None
+    return shaped
+
@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+SHINGLE_SIZE = 5          # Words per shingle
+PASSAGE_WORDS = 120       # Target words per indexed passage
+NUM_PERM = 128            # Signature length
+LSH_BANDS = 32            # NUM_PERM = LSH_BANDS * LSH_ROWS
+LSH_ROWS = NUM_PERM // LSH_BANDS
+MATCH_THRESHOLD = 0.3     # Estimated Jaccard above which two passages overlap
+SECTIONS = ['abstract', 'introduction', 'methodology', 'results', 'conclusion']
+
+_MAX_HASH = (1 << 63) - 1  # Signatures are stored as MongoDB int64
+_WORD = re.compile(r"\w+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n|\n")
+
+
+def _hash(data: str) -> int:
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big") & _MAX_HASH
+
+
+def shingles(words: List[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashes of every run of ``size`` consecutive words"""
+    if len(words) < size:
+        return {_hash(" ".join(words))} if words else set()
+    return {_hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(shingle_set: Iterable[int]) -> List[int]:
+    """
+    One-permutation MinHash signature of a shingle set
+
+    Each shingle lands in one of NUM_PERM bins and every bin keeps its
+    smallest value, so the cost is linear in the number of shingles rather
+    than NUM_PERM times it. Empty bins borrow from the next non-empty bin.
+    """
+    bins = [_MAX_HASH] * NUM_PERM
+    for value in shingle_set:
+        index = value % NUM_PERM
+        rest = value // NUM_PERM
+        if rest < bins[index]:
+            bins[index] = rest
+
+    filled = [i for i, value in enumerate(bins) if value != _MAX_HASH]
+    if not filled:
+        return bins
+    for i in range(NUM_PERM):
+        if bins[i] == _MAX_HASH:
+            # Densify with the next filled bin (wrapping around), offset by the distance
+            donor = next((j for j in filled if j > i), filled[0])
+            distance = (donor - i) % NUM_PERM
+            bins[i] = (bins[donor] + distance * 0x9E3779B97F4A7C15) & _MAX_HASH
+    return bins
+
+
+def lsh_bands(signature: List[int]) -> List[str]:
+    """Bucket keys for locality-sensitive hashing, one per band"""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        keys.append(f"{band}:{_hash(','.join(map(str, rows))):x}")
+    return keys
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def split_passages(text: str, section: str = None) -> List[Tuple[str, str, List[str]]]:
+    """
+    Split text into passages of roughly PASSAGE_WORDS words
+
+    Short paragraphs are merged and long ones are cut, so a pasted
+    paragraph still lines up with a stored passage.
+
+    Returns:
+        (section, passage text, lower-cased words) tuples
+    """
+    passages = []
+    buffer: List[str] = []
+    words: List[str] = []
+
+    def flush():
+        if words:
+            passages.append((section, " ".join(buffer), list(words)))
+        buffer.clear()
+        words.clear()
+
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        paragraph_words = _WORD.findall(paragraph.lower())
+        if not paragraph_words:
+            continue
+        if len(paragraph_words) > PASSAGE_WORDS:
+            flush()
+            raw_words = paragraph.split()
+            for start in range(0, len(raw_words), PASSAGE_WORDS):
+                buffer.append(" ".join(raw_words[start:start + PASSAGE_WORDS]))
+                words.extend(_WORD.findall(buffer[-1].lower()))
+                flush()
+            continue
+        buffer.append(paragraph)
+        words.extend(paragraph_words)
+        if len(words) >= PASSAGE_WORDS // 2:
+            flush()
+    flush()
+    return passages
+
+
+def report_passages(report: Dict[str, Any]) -> List[Tuple[str, str, List[str]]]:
+    passages = []
+    for section in SECTIONS:
+        if report.get(section):
+            passages.extend(split_passages(report[section], section))
+    return passages
+
+
+def passage_documents(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build the stored passage signatures for a report"""
+    documents = []
+    for position, (section, text, words) in enumerate(report_passages(report)):
+        signature = minhash_signature(shingles(words))
+        documents.append({
+            "report_id": report["_id"],
+            "user_id": report.get("user_id"),
+            "position": position,
+            "section": section,
+            "snippet": text[:300],
+            "signature": signature,
+            "bands": lsh_bands(signature),
+        })
+    return documents
+
+
+class SimilarityIndex:
+    """Passage-level MinHash/LSH index over the reports collection, stored in MongoDB"""
+
+    def __init__(self, signatures, reports):
+        self.signatures = signatures
+        self.reports = reports
+
+    async def index_reports(self, reports: List[Dict[str, Any]]) -> None:
+        """Replace the stored passages of the given reports"""
+        if not reports:
+            return
+        await self.signatures.delete_many({"report_id": {"$in": [report["_id"] for report in reports]}})
+        # Shingling is CPU-bound, keep it off the event loop for bulk imports
+        documents = await asyncio.to_thread(
+            lambda: [document for report in reports for document in passage_documents(report)]
+        )
+        if documents:
+            await self.signatures.insert_many(documents, ordered=False)
+
+    async def query(self, text: str, top_k: int = 5, exclude_id: Any = None) -> List[Dict[str, Any]]:
+        """
+        Return the stored reports that overlap ``text`` the most
+
+        Each match carries ``coverage`` (share of the query's passages found
+        in that report), the best passage similarity and the matching passages.
+        """
+        query_passages = split_passages(text)
+        signatures = await asyncio.to_thread(
+            lambda: [minhash_signature(shingles(words)) for _, _, words in query_passages]
+        )
+        band_owners: Dict[str, Set[int]] = defaultdict(set)
+        for index, signature in enumerate(signatures):
+            for band in lsh_bands(signature):
+                band_owners[band].add(index)
+        if not band_owners:
+            return []
+
+        # report_id -> {query passage index: best (similarity, passage)}
+        hits: Dict[Any, Dict[int, Tuple[float, Dict[str, Any]]]] = defaultdict(dict)
+        cursor = self.signatures.find(
+            {"bands": {"$in": list(band_owners)}},
+            {"report_id": 1, "section": 1, "snippet": 1, "signature": 1, "bands": 1},
+        )
+        async for passage in cursor:
+            if passage["report_id"] == exclude_id:
+                continue
+            owners = set().union(*(band_owners.get(band, ()) for band in passage["bands"]))
+            for index in owners:
+                score = estimate_similarity(signatures[index], passage["signature"])
+                best = hits[passage["report_id"]].get(index)
+                if score >= MATCH_THRESHOLD and (best is None or score > best[0]):
+                    hits[passage["report_id"]][index] = (score, passage)
+
+        ranked = sorted(
+            hits.items(),
+            key=lambda item: (len(item[1]), max(score for score, _ in item[1].values())),
+            reverse=True,
+        )[:top_k]
+        if not ranked:
+            return []
+
+        titles = {
+            report["_id"]: report.get("title")
+            async for report in self.reports.find({"_id": {"$in": [report_id for report_id, _ in ranked]}}, {"title": 1})
+        }
+        matches = []
+        for report_id, matched in ranked:
+            passages = sorted(matched.items(), key=lambda item: item[1][0], reverse=True)
+            matches.append({
+                "report_id": str(report_id),
+                "title": titles.get(report_id),
+                "coverage": round(len(matched) / len(query_passages), 3),
+                "similarity": round(passages[0][1][0], 3),
+                "passages": [
+                    {
+                        "query": query_passages[index][1][:300],
+                        "section": passage["section"],
+                        "text": passage["snippet"],
+                        "similarity": round(score, 3),
+                    }
+                    for index, (score, passage) in passages[:5]
+                ],
+            })
+        return matches
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Return the similarity index backed by the current database"""
+    from database import get_reports_collection, get_signatures_collection
+    return SimilarityIndex(get_signatures_collection(), get_reports_collection())
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+SUMMARY_MAX_FANOUT = int(os.getenv("SUMMARY_MAX_FANOUT", "4"))
+
+# Rough characters-per-token ratio for English prose
+CHARS_PER_TOKEN = 4
+
+CHUNK_PROMPT = """Summarize the following part of a larger document.
+    Keep every key point, method, result and conclusion it contains, and keep technical terms unchanged.
+
+    Part {index} of {total}:
+    {text}
+
+    Summary:"""
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for chunk sizing"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _split_oversized(paragraph: str, max_chars: int) -> List[str]:
+    """Split a paragraph that is too large on sentence, then character, boundaries"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+    """
+    Split text into chunks of at most ``max_tokens`` estimated tokens
+
+    Chunks are packed from whole paragraphs (sections and headings are
+    separated by blank lines), so a chunk boundary only falls inside a
+    paragraph when that paragraph is larger than a chunk on its own.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else _split_oversized(paragraph, max_chars)
+        for piece in pieces:
+            if current and current_len + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current, current_len = [], 0
+            current.append(piece)
+            current_len += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+async def condense(text: str, generate: Callable[[str], Awaitable[str]],
+                   chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+                   max_fanout: int = SUMMARY_MAX_FANOUT) -> str:
+    """
+    Map step: summarize chunks concurrently until the result fits in one chunk
+
+    Args:
+        text: The full input text
+        generate: Coroutine function sending a prompt to the model
+        chunk_tokens: Maximum estimated tokens per chunk
+        max_fanout: Maximum number of chunk summaries in flight at once
+
+    Returns:
+        The concatenated partial summaries (or ``text`` if it already fits)
+    """
+    semaphore = asyncio.Semaphore(max_fanout)
+
+    async def summarize(index: int, total: int, chunk: str) -> str:
+        async with semaphore:
+            return await generate(CHUNK_PROMPT.format(index=index, total=total, text=chunk))
+
+    while estimate_tokens(text) > chunk_tokens:
+        chunks = split_into_chunks(text, chunk_tokens)
+        partials = await asyncio.gather(*[
+            summarize(i, len(chunks), chunk) for i, chunk in enumerate(chunks, start=1)
+        ])
+        condensed = "\n\n".join(partials)
+        if len(condensed) >= len(text):
+            # The model is not shrinking the input; stop instead of looping forever
+            text = condensed
+            break
+        text = condensed
+    return text
+
+
+async def map_reduce_summarize(text: str, reduce_template: str,
+                               generate: Callable[[str], Awaitable[str]],
+                               chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+                               max_fanout: int = SUMMARY_MAX_FANOUT,
+                               chunk_generate: Optional[Callable[[str], Awaitable[str]]] = None) -> str:
+    """
+    Summarize a large document chunk by chunk, then reduce with ``reduce_template``
+
+    ``chunk_generate`` (default ``generate``) is used for the chunk summaries,
+    so they can run at a lower priority than the final reduce pass.
+    """
+    condensed = await condense(text, chunk_generate or generate, chunk_tokens, max_fanout)
+    return await generate(reduce_template.format(text=condensed))
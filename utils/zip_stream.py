@@ -0,0 +1,56 @@
+import time
+import zipfile
+from typing import AsyncIterator, List
+
+
+class _Sink:
+    """Write-only file object that hands written bytes back to the caller"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """
+    Build a ZIP archive incrementally, yielding its bytes as entries are written
+
+    The archive is never seekable, so entries use data descriptors and only
+    the central directory (a few dozen bytes per entry) stays in memory.
+    """
+
+    def __init__(self, compresslevel: int = 1):
+        self._sink = _Sink()
+        # Low compression: DOCX and PDF files are already compressed
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=compresslevel)
+
+    async def add(self, name: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Write one entry from an async byte iterator, yielding archive bytes as they are produced"""
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with self._zip.open(info, "w", force_zip64=True) as entry:
+            async for chunk in chunks:
+                entry.write(chunk)
+                data = self._sink.drain()
+                if data:
+                    yield data
+        data = self._sink.drain()
+        if data:
+            yield data
+
+    def close(self) -> bytes:
+        """Finish the archive and return its remaining bytes (the central directory)"""
+        self._zip.close()
+        return self._sink.drain()
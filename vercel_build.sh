@@ -4,4 +4,6 @@
 pip install -r requirements.txt
 
 # No need to create output directory as we'll use /tmp
-# Vercel's serverless environment provides a writable /tmp directory
+# Vercel's serverless environment provides a writable /tmp directory.
+# /tmp only holds a per-instance cache; generated files are stored in
+# MongoDB GridFS so any instance can serve them.